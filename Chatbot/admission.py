@@ -0,0 +1,225 @@
+# admission.py
+"""
+Admission control in front of the response stage
+
+At most ADMISSION_SLOTS requests generate replies at once; the rest wait
+in a bounded queue ordered by distress level (high first), then arrival.
+A full queue sheds the lowest-priority waiter to make room for a more
+urgent message, or rejects the new one. Rejected requests get a 503 with
+Retry-After.
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, TimeoutError
+from contextlib import asynccontextmanager, contextmanager
+
+# Shared helpers live in ml/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ml"))
+from metrics import Counter, Gauge, stage_seconds
+
+# --------------------
+# Admission Config
+# --------------------
+ADMISSION_SLOTS = int(os.environ.get("ADMISSION_SLOTS", 8))
+ADMISSION_QUEUE = int(os.environ.get("ADMISSION_QUEUE", 32))
+# asgi_server.py: a waiting conversation is a coroutine rather than a
+# thread, so slots + queue (the cap on concurrent conversations) can be
+# much larger. The LLM itself is still bounded by OLLAMA_MAX_INFLIGHT.
+ASYNC_ADMISSION_SLOTS = int(os.environ.get("ASYNC_ADMISSION_SLOTS", 64))
+ASYNC_ADMISSION_QUEUE = int(os.environ.get("ASYNC_ADMISSION_QUEUE", 512))
+# Seconds a request may wait for a slot before it is shed
+ADMISSION_TIMEOUT = float(os.environ.get("ADMISSION_TIMEOUT", 10))
+RETRY_AFTER = int(os.environ.get("ADMISSION_RETRY_AFTER", 2))
+
+# Lower is served first
+PRIORITY = {"high": 0, "moderate": 1, "low": 2}
+
+rejected_total = Counter(
+    "chat_admission_rejected_total",
+    "Requests shed by admission control, by reason",
+    label="reason"
+)
+
+def distress_priority(distress_level):
+    return PRIORITY.get(distress_level, len(PRIORITY))
+
+class Overloaded(Exception):
+    def __init__(self, reason, retry_after=RETRY_AFTER):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """
+    Priority semaphore: each waiter holds a Future that release() resolves
+    for the most urgent one, so threads and coroutines share one queue
+    """
+
+    def __init__(
+        self,
+        slots=ADMISSION_SLOTS,
+        max_queue=ADMISSION_QUEUE,
+        timeout=ADMISSION_TIMEOUT,
+        retry_after=RETRY_AFTER
+    ):
+        self.slots = slots
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.retry_after = retry_after
+
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._waiters = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+
+        self.admitted = 0
+        self._rejected = {}
+
+    def _reject(self, reason):
+        rejected_total.inc(reason)
+        self._rejected[reason] = self._rejected.get(reason, 0) + 1
+        return Overloaded(reason, self.retry_after)
+
+    def _enqueue(self, priority):
+        future = Future()
+        with self._lock:
+            if self._in_use < self.slots and not self._waiters:
+                self._in_use += 1
+                self.admitted += 1
+                future.set_result(True)
+                return future
+
+            if len(self._waiters) >= self.max_queue:
+                worst = max(self._waiters, default=None)
+                if worst is None or worst[0] <= priority:
+                    raise self._reject("queue_full")
+
+                # Make room for a more urgent message
+                self._waiters.remove(worst)
+                heapq.heapify(self._waiters)
+                worst[2].set_exception(self._reject("displaced"))
+
+            heapq.heappush(self._waiters, (priority, next(self._seq), future))
+            return future
+
+    def _give_up(self, future):
+        # Timed out: leave the queue unless a slot arrived in the meantime
+        with self._lock:
+            if future.done():
+                return future.result()
+            self._waiters = [w for w in self._waiters if w[2] is not future]
+            heapq.heapify(self._waiters)
+            future.cancel()
+        raise self._reject("timeout")
+
+    def _abandon(self, future):
+        # Cancelled or interrupted: leave the queue, or hand back a slot
+        # that was granted in the meantime so it isn't held forever
+        with self._lock:
+            granted = (
+                future.done()
+                and not future.cancelled()
+                and future.exception() is None
+            )
+            if not granted:
+                self._waiters = [w for w in self._waiters if w[2] is not future]
+                heapq.heapify(self._waiters)
+                future.cancel()
+        if granted:
+            self.release()
+
+    def acquire(self, priority):
+        start = time.perf_counter()
+        future = self._enqueue(priority)
+        try:
+            future.result(timeout=self.timeout)
+        except TimeoutError:
+            self._give_up(future)
+        except BaseException:
+            self._abandon(future)
+            raise
+        finally:
+            stage_seconds.observe("queue", time.perf_counter() - start)
+
+    async def acquire_async(self, priority):
+        start = time.perf_counter()
+        future = self._enqueue(priority)
+        try:
+            await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(future)), self.timeout
+            )
+        except asyncio.TimeoutError:
+            self._give_up(future)
+        except BaseException:
+            self._abandon(future)
+            raise
+        finally:
+            stage_seconds.observe("queue", time.perf_counter() - start)
+
+    def release(self):
+        with self._lock:
+            while self._waiters:
+                _, _, future = heapq.heappop(self._waiters)
+                try:
+                    future.set_result(True)
+                except InvalidStateError:
+                    continue  # gave up or was displaced
+                self.admitted += 1
+                return
+            self._in_use -= 1
+
+    @contextmanager
+    def admit(self, priority):
+        self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def admit_async(self, priority):
+        await self.acquire_async(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def resize(self, slots, max_queue):
+        """
+        Change the limits; waiters move into any slots this frees up
+        """
+        with self._lock:
+            self.slots = slots
+            self.max_queue = max_queue
+            while self._in_use < self.slots and self._waiters:
+                _, _, future = heapq.heappop(self._waiters)
+                try:
+                    future.set_result(True)
+                except InvalidStateError:
+                    continue  # gave up or was displaced
+                self._in_use += 1
+                self.admitted += 1
+
+    def queue_depth(self):
+        return len(self._waiters)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "slots": self.slots,
+                "in_use": self._in_use,
+                "queue_depth": len(self._waiters),
+                "max_queue": self.max_queue,
+                "admitted": self.admitted,
+                "rejected": dict(self._rejected)
+            }
+
+admission = AdmissionController()
+
+Gauge("chat_admission_queue_depth", "Requests waiting for a response slot", admission.queue_depth)
+Gauge("chat_admission_in_use", "Response slots in use", lambda: admission.stats()["in_use"])
@@ -2,7 +2,7 @@ import streamlit as st
 from emotion_model import detect_emotion
 from distress_scoring import get_distress_level
 from response import generate_response
-from mood_tracker import log_mood, get_mood_history
+from mood_tracker import MoodTracker, log_mood, get_mood_history
 
 # --------------------
 # Page Config
@@ -137,6 +137,8 @@ with st.sidebar:
         st.session_state.emotion_history = []
         st.session_state.last_emotion = None
         st.session_state.last_bot_action = None
+        st.session_state.llm_session = {}
+        st.session_state.mood_tracker = MoodTracker()
 
 # --------------------
 # Session State Setup
@@ -156,6 +158,14 @@ if "emotion_history" not in st.session_state:
 if "last_bot_action" not in st.session_state:
     st.session_state.last_bot_action = None
 
+# Ollama context reused between turns
+if "llm_session" not in st.session_state:
+    st.session_state.llm_session = {}
+
+# Bounded mood history for this browser session
+if "mood_tracker" not in st.session_state:
+    st.session_state.mood_tracker = MoodTracker()
+
 # --------------------
 # Display Chat History
 # --------------------
@@ -221,7 +231,8 @@ if user_input:
             user_text=user_input,
             last_emotion=st.session_state.last_emotion,
             emotion_history=st.session_state.emotion_history,
-            last_bot_action=st.session_state.last_bot_action
+            last_bot_action=st.session_state.last_bot_action,
+            llm_session=st.session_state.llm_session
         )
 
     # Detect bot intent
@@ -231,7 +242,12 @@ if user_input:
         st.session_state.last_bot_action = "general_support"
 
     # Log mood
-    log_mood(emotion, distress_level)
+    log_mood(
+        st.session_state.mood_tracker,
+        emotion,
+        distress_level,
+        user_input
+    )
 
     # Show assistant response
     st.session_state.messages.append(
@@ -246,5 +262,6 @@ if user_input:
 # Mood History
 # --------------------
 with st.expander("📈 View Mood History"):
-    history = get_mood_history()
+    st.write(st.session_state.mood_tracker.summary())
+    history = get_mood_history(st.session_state.mood_tracker, limit=20)
     st.write(history)
@@ -0,0 +1,149 @@
+# asgi_server.py
+"""
+asyncio serving mode for the chatbot (same /chat contract as server.py)
+
+One event loop holds many in-flight conversations: LLM calls are awaited
+on a non-blocking HTTP client, emotion inference goes through the
+micro-batcher thread and other CPU work runs on a bounded thread pool.
+Admission uses ASYNC_ADMISSION_SLOTS / ASYNC_ADMISSION_QUEUE (64 + 512
+concurrent conversations by default) instead of the Flask-sized limits.
+
+    python asgi_server.py
+    uvicorn asgi_server:app --host 0.0.0.0 --port 5000
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from quart import Quart, Response, jsonify, request
+
+from conversation import (
+    finish_turn,
+    get_session,
+    record_emotion,
+    reset_session,
+    response_kwargs,
+    server_timing,
+    session_stats
+)
+from distress_scoring import get_distress_level
+from emotion_model import submit_emotion
+from inference_service import EMOTION
+from llm_cache import response_cache
+from local_llm import circuit_state, close_async_client
+from model_registry import warmup
+from admission import (
+    ASYNC_ADMISSION_QUEUE,
+    ASYNC_ADMISSION_SLOTS,
+    Overloaded,
+    admission,
+    distress_priority
+)
+from metrics import CONTENT_TYPE, render as render_metrics, stage_seconds
+from response import agenerate_response, response_models
+
+# Threads for CPU-bound and blocking work (bank ranking, cache embeddings,
+# SQL session store)
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", 4))
+
+app = Quart(__name__)
+inference_pool = ThreadPoolExecutor(
+    max_workers=INFERENCE_WORKERS,
+    thread_name_prefix="inference"
+)
+
+@app.before_serving
+async def startup():
+    admission.resize(ASYNC_ADMISSION_SLOTS, ASYNC_ADMISSION_QUEUE)
+
+@app.after_serving
+async def shutdown():
+    await close_async_client()
+    inference_pool.shutdown(wait=False)
+
+@app.errorhandler(Overloaded)
+async def overloaded(e):
+    resp = jsonify({"error": "busy", "reason": e.reason, "retry_after": e.retry_after})
+    resp.status_code = 503
+    resp.headers["Retry-After"] = str(e.retry_after)
+    return resp
+
+@app.route("/chat", methods=["POST"])
+async def chat():
+    data = await request.get_json()
+    session_id = data.get("session_id", "default")
+    user_text = data.get("message", "").strip()
+
+    if not user_text:
+        return jsonify({"response": "Please say something so I can help."})
+
+    started = time.perf_counter()
+
+    # ---- Emotion pipeline (also sets the queue priority) ----
+    emotion, score = await asyncio.wrap_future(submit_emotion(user_text))
+    classified = time.perf_counter()
+    stage_seconds.observe("emotion", classified - started)
+    with stage_seconds.time("distress"):
+        distress = get_distress_level(emotion, score)
+
+    # ---- Generate response (most distressed first under load) ----
+    loop = asyncio.get_running_loop()
+    async with admission.admit_async(distress_priority(distress)):
+        admitted = time.perf_counter()
+        session = await loop.run_in_executor(inference_pool, get_session, session_id)
+        record_emotion(session, emotion)
+        reply = await agenerate_response(
+            **response_kwargs(session, user_text, emotion, distress),
+            executor=inference_pool
+        )
+        generated = time.perf_counter()
+        await loop.run_in_executor(inference_pool, finish_turn, session, reply)
+
+    stage_seconds.observe("response", generated - admitted)
+    stage_seconds.observe("chat", time.perf_counter() - started)
+
+    resp = jsonify({
+        "response": reply,
+        "emotion": emotion,
+        "distress_level": distress
+    })
+    resp.headers["Server-Timing"] = server_timing(
+        emotion=classified - started,
+        queue=admitted - classified,
+        response=generated - admitted
+    )
+    return resp
+
+@app.route("/chat/reset", methods=["POST"])
+async def chat_reset():
+    data = await request.get_json(silent=True) or {}
+    await asyncio.get_running_loop().run_in_executor(
+        inference_pool, reset_session, data.get("session_id", "default")
+    )
+    return jsonify({"status": "cleared"})
+
+@app.route("/health", methods=["GET"])
+async def health():
+    loop = asyncio.get_running_loop()
+    return jsonify({
+        "llm": circuit_state(),
+        "llm_cache": response_cache.stats(),
+        "sessions": await loop.run_in_executor(inference_pool, session_stats),
+        "admission": admission.stats()
+    })
+
+@app.route("/metrics", methods=["GET"])
+async def metrics():
+    # Gauge callbacks may query the SQL session store
+    body = await asyncio.get_running_loop().run_in_executor(inference_pool, render_metrics)
+    return Response(body, content_type=CONTENT_TYPE)
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # Load models up front so the first /chat doesn't pay for it
+    for name, seconds in warmup([EMOTION, *response_models()]).items():
+        print(f"Loaded {name} in {seconds:.2f}s")
+
+    uvicorn.run(app, host="0.0.0.0", port=5000)
@@ -0,0 +1,98 @@
+# batch_chat.py
+"""
+Batch processing of (session_id, message) items, e.g. replaying exported
+transcripts for QA and analytics
+
+Emotions are classified in padded batches; replies are generated with
+each session's turns in input order (different sessions in parallel),
+and results are yielded in input order as they become ready.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from admission import Overloaded, admission, distress_priority
+from conversation import finish_turn, get_session, record_emotion, response_kwargs
+from distress_scoring import get_distress_level
+from emotion_model import detect_emotion_batch
+from response import generate_response
+
+# --------------------
+# Batch Config
+# --------------------
+# Items classified (and then answered) per round
+CHAT_BATCH_SIZE = int(os.environ.get("CHAT_BATCH_SIZE", 64))
+# Sessions answered concurrently within a round
+CHAT_BATCH_WORKERS = int(os.environ.get("CHAT_BATCH_WORKERS", 4))
+
+EMPTY_REPLY = "Please say something so I can help."
+
+def _answer(session_id, turns):
+    # One session's turns, in order: each turn sees the state of the last
+    session = get_session(session_id)
+    results = []
+
+    for index, user_text, emotion, score in turns:
+        result = {"index": index, "session_id": session_id}
+        try:
+            distress = get_distress_level(emotion, score)
+            # Same slots and load shedding as /chat
+            with admission.admit(distress_priority(distress)):
+                record_emotion(session, emotion)
+                reply = generate_response(
+                    **response_kwargs(session, user_text, emotion, distress)
+                )
+                finish_turn(session, reply)
+            result.update(response=reply, emotion=emotion, distress_level=distress)
+        except Overloaded as e:
+            result.update(error="busy", reason=e.reason, retry_after=e.retry_after)
+        except Exception as e:
+            result["error"] = str(e)
+        results.append(result)
+
+    return results
+
+def chat_batch(items, batch_size=CHAT_BATCH_SIZE, workers=CHAT_BATCH_WORKERS):
+    """
+    Yield one result dict per ``(session_id, message)`` item, in input
+    order: ``{"index", "session_id", "response", "emotion",
+    "distress_level"}`` (or ``"error"`` if that turn failed or was shed)
+    """
+    items = iter(items)
+    index = 0
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chat-batch") as pool:
+        while True:
+            chunk = []
+            for session_id, message in items:
+                chunk.append((index, str(session_id or "default"), (message or "").strip()))
+                index += 1
+                if len(chunk) >= batch_size:
+                    break
+            if not chunk:
+                return
+
+            texts = [text for _, _, text in chunk if text]
+            emotions = iter(detect_emotion_batch(texts))
+
+            by_session = {}
+            ready = {}
+            for i, session_id, text in chunk:
+                if not text:
+                    ready[i] = {"index": i, "session_id": session_id, "response": EMPTY_REPLY}
+                    continue
+                emotion, score = next(emotions)
+                by_session.setdefault(session_id, []).append((i, text, emotion, score))
+
+            futures = {
+                session_id: pool.submit(_answer, session_id, turns)
+                for session_id, turns in by_session.items()
+            }
+
+            # Stream in input order, waiting only for the session in front
+            done = {}
+            for i, session_id, _ in chunk:
+                if i not in ready:
+                    if session_id not in done:
+                        done[session_id] = iter(futures[session_id].result())
+                    ready[i] = next(done[session_id])
+                yield ready.pop(i)
@@ -0,0 +1,76 @@
+# conversation.py
+"""
+Per-session conversation state shared by the Flask and ASGI servers
+"""
+import hashlib
+import os
+import sys
+
+# Shared helpers live in ml/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ml"))
+from metrics import Counter, Gauge
+from session_store import HISTORY_LEN, SESSION_ID_MAX_LEN, make_store
+
+# Bounded session store (SESSION_STORE=memory | sqlite)
+session_store = make_store()
+
+Gauge("chat_sessions", "Sessions held by the session store", lambda: len(session_store))
+Counter(
+    "chat_session_events_total",
+    "Sessions created / expired / evicted by this process",
+    label="event",
+    collect=lambda: {k: session_store.stats()[k] for k in ("created", "expired", "evicted")}
+)
+
+def session_key(session_id):
+    # Client-supplied ids: long ones are keyed on a digest of the whole id
+    # (truncating would merge sessions that share a prefix)
+    session_id = str(session_id)
+    if len(session_id) <= SESSION_ID_MAX_LEN:
+        return session_id
+    return "sha256:" + hashlib.sha256(session_id.encode("utf-8")).hexdigest()
+
+def get_session(session_id):
+    return session_store.get(session_key(session_id))
+
+def reset_session(session_id):
+    # Drops the conversation memory, including the cached Ollama context
+    session_store.delete(session_key(session_id))
+
+def session_stats():
+    return session_store.stats()
+
+def record_emotion(session, emotion):
+    session["turn_count"] += 1
+
+    if emotion not in ["neutral", None]:
+        session["last_emotion"] = emotion
+        session["emotion_history"].append(emotion)
+        session["emotion_history"] = session["emotion_history"][-HISTORY_LEN:]
+
+def response_kwargs(session, user_text, emotion, distress):
+    return dict(
+        emotion=emotion,
+        distress_level=distress,
+        turn_count=session["turn_count"],
+        user_text=user_text,
+        last_emotion=session["last_emotion"],
+        emotion_history=session["emotion_history"],
+        last_bot_action=session["last_bot_action"],
+        llm_session=session
+    )
+
+def finish_turn(session, reply):
+    # Update bot intent memory
+    if "try" in reply.lower():
+        session["last_bot_action"] = "offered_coping"
+    else:
+        session["last_bot_action"] = "general_support"
+
+    session_store.save(session)
+
+def server_timing(**stages):
+    # Per-stage durations (seconds) as a Server-Timing header value
+    return ", ".join(
+        f"{name};dur={seconds * 1000:.1f}" for name, seconds in stages.items()
+    )
@@ -1,12 +1,19 @@
 # emotion_model.py
-from transformers import pipeline
+import os
+import sys
+from concurrent.futures import Future
 
-# Load GoEmotions emotion classifier
-emotion_classifier = pipeline(
-    "text-classification",
-    model="SamLowe/roberta-base-go_emotions",
-    top_k=3
-)
+# Shared inference helpers live in ml/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ml"))
+from micro_batcher import MicroBatcher
+from inference_service import classify_emotions
+from result_cache import normalize_text, text_cache
+
+# --------------------
+# Batching Config
+# --------------------
+BATCH_MAX_SIZE = int(os.environ.get("EMOTION_BATCH_MAX_SIZE", 16))
+BATCH_MAX_WAIT_MS = float(os.environ.get("EMOTION_BATCH_MAX_WAIT_MS", 5))
 
 # Map GoEmotions labels to mental-health categories
 EMOTION_MAP = {
@@ -25,9 +32,7 @@ EMOTION_MAP = {
     "exhaustion": "emotional_exhaustion"
 }
 
-def detect_emotion(text):
-    results = emotion_classifier(text)[0]
-
+def map_emotion(results):
     for item in results:
         label = item["label"].lower()
         score = item["score"]
@@ -36,3 +41,71 @@ def detect_emotion(text):
             return EMOTION_MAP[label], score
 
     return "neutral", 0.5
+
+def detect_emotions(texts):
+    """
+    Classify a list of texts in one padded forward pass
+    """
+    if not texts:
+        return []
+
+    # GoEmotions distributions from the shared inference service
+    results = classify_emotions(texts)
+    return [map_emotion(r[:3]) for r in results]
+
+# Concurrent detect_emotion() calls are grouped into one batch
+emotion_batcher = MicroBatcher(
+    detect_emotions,
+    max_batch_size=BATCH_MAX_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS
+)
+
+def detect_emotion(text):
+    return text_cache.get_or_compute("emotion", text, emotion_batcher)
+
+def detect_emotion_batch(texts, batch_size=BATCH_MAX_SIZE):
+    """
+    detect_emotion() for many texts at once: cached results are reused,
+    repeated texts classified once and the rest in padded batches
+    """
+    results = [None] * len(texts)
+    missing = {}
+
+    for i, text in enumerate(texts):
+        cached = text_cache.get("emotion", text) if normalize_text(text) else None
+        if cached is not None:
+            results[i] = cached
+        else:
+            missing.setdefault(text, []).append(i)
+
+    pending = list(missing)
+    for start in range(0, len(pending), batch_size):
+        chunk = pending[start:start + batch_size]
+        for text, result in zip(chunk, detect_emotions(chunk)):
+            if normalize_text(text):
+                text_cache.set("emotion", text, result)
+            for i in missing[text]:
+                results[i] = result
+
+    return results
+
+def submit_emotion(text):
+    """
+    Non-blocking detect_emotion(): returns a concurrent.futures.Future that
+    the batcher resolves (asyncio callers can wrap it with wrap_future)
+    """
+    if normalize_text(text):
+        cached = text_cache.get("emotion", text)
+        if cached is not None:
+            future = Future()
+            future.set_result(cached)
+            return future
+
+    future = emotion_batcher.submit(text)
+
+    def remember(f):
+        if normalize_text(text) and not f.cancelled() and f.exception() is None:
+            text_cache.set("emotion", text, f.result())
+
+    future.add_done_callback(remember)
+    return future
@@ -0,0 +1,138 @@
+# fake_ollama.py
+"""
+Local stand-in for the Ollama /api/generate endpoint
+
+Simulates time-to-first-token, token rate and failures so /chat can be
+benchmarked without a real model:
+
+    python fake_ollama.py --port 11434 --latency-ms 300 --tokens-per-sec 40
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY_WORDS = (
+    "That sounds really hard, and it makes sense that you feel this way. "
+    "I'm here with you. Would you like to try a slow breath together, "
+    "or tell me a bit more about what has been going on?"
+).split()
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    # Set by start_fake_ollama()
+    latency_ms = 200.0
+    tokens_per_sec = 50.0
+    failure_rate = 0.0
+    reply_tokens = 30
+
+    def do_POST(self):
+        if self.path != "/api/generate":
+            self.send_error(404)
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        if random.random() < self.failure_rate:
+            self.send_error(503, "simulated failure")
+            return
+
+        time.sleep(self.latency_ms / 1000.0)
+
+        tokens = [
+            (" " if i else "") + REPLY_WORDS[i % len(REPLY_WORDS)]
+            for i in range(self.reply_tokens)
+        ]
+        context = list(body.get("context") or []) + list(range(len(body.get("prompt", "")) // 4))
+        delay = 1.0 / self.tokens_per_sec if self.tokens_per_sec > 0 else 0.0
+
+        if body.get("stream", True):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            for token in tokens:
+                time.sleep(delay)
+                self._chunk({"model": body.get("model"), "response": token, "done": False})
+            self._chunk({"model": body.get("model"), "response": "", "done": True, "context": context})
+            self.wfile.write(b"0\r\n\r\n")
+            return
+
+        time.sleep(delay * len(tokens))
+        payload = json.dumps({
+            "model": body.get("model"),
+            "response": "".join(tokens),
+            "done": True,
+            "context": context
+        }).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _chunk(self, data):
+        line = (json.dumps(data) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(line):X}\r\n".encode("ascii") + line + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Cancelled and timed-out calls hang up mid-stream; that is expected
+        # and not worth a traceback
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+def start_fake_ollama(
+    host="127.0.0.1",
+    port=0,
+    latency_ms=200.0,
+    tokens_per_sec=50.0,
+    failure_rate=0.0,
+    reply_tokens=30
+):
+    """
+    Serve in a background thread; returns the server (see .server_address)
+    """
+    handler = type("ConfiguredFakeOllama", (FakeOllamaHandler,), {
+        "latency_ms": latency_ms,
+        "tokens_per_sec": tokens_per_sec,
+        "failure_rate": failure_rate,
+        "reply_tokens": reply_tokens
+    })
+    server = FakeOllamaServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--tokens-per-sec", type=float, default=50.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--reply-tokens", type=int, default=30)
+    args = parser.parse_args()
+
+    server = start_fake_ollama(
+        args.host, args.port, args.latency_ms,
+        args.tokens_per_sec, args.failure_rate, args.reply_tokens
+    )
+    print(f"Fake Ollama listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,183 @@
+# llm_cache.py
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import Counter, Gauge
+from result_cache import normalize_text, text_cache
+
+# --------------------
+# Cache Config
+# --------------------
+LLM_CACHE_SIZE = int(os.environ.get("LLM_CACHE_SIZE", 512))
+LLM_CACHE_TTL = float(os.environ.get("LLM_CACHE_TTL", 1800))
+LLM_CACHE_VARIANTS = int(os.environ.get("LLM_CACHE_VARIANTS", 3))
+LLM_CACHE_MIN_VARIANTS = int(os.environ.get("LLM_CACHE_MIN_VARIANTS", 2))
+LLM_CACHE_MAX_WORDS = int(os.environ.get("LLM_CACHE_MAX_WORDS", 8))
+# Cosine similarity on user_input embeddings (0 = exact text match only)
+LLM_CACHE_SIMILARITY = float(os.environ.get("LLM_CACHE_SIMILARITY", 0))
+
+# Never serve canned replies to these
+BYPASS_DISTRESS = ["moderate", "high"]
+
+class ResponseCache:
+    """
+    LLM replies keyed on the prompt state (emotion, distress level, trend,
+    last bot action) plus the normalized user text. Each key keeps a few
+    reply variants and rotates through them so users don't get the same
+    sentence twice in a row. With ``similarity`` > 0 a near-identical user
+    text (by embedding cosine) also counts as a hit.
+
+    Only turns sent without a session's Ollama ``context`` are cached: a
+    reply generated with it may refer to that conversation and must never
+    be served to another session. Since sessions keep their context between
+    turns, in practice that means a session's first turn (or the first
+    after its context went idle).
+    """
+
+    def __init__(
+        self,
+        maxsize=LLM_CACHE_SIZE,
+        ttl=LLM_CACHE_TTL,
+        variants=LLM_CACHE_VARIANTS,
+        min_variants=LLM_CACHE_MIN_VARIANTS,
+        max_words=LLM_CACHE_MAX_WORDS,
+        similarity=LLM_CACHE_SIMILARITY,
+        embed=None
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.variants = variants
+        self.min_variants = min(min_variants, variants)
+        self.max_words = max_words
+        self.similarity = similarity
+        self.embed = embed
+
+        # (state_key, text) -> entry, in LRU order
+        self._entries = OrderedDict()
+        # state_key -> texts stored under it, for similarity scans
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+
+    def _cacheable(self, state, context=None):
+        if context or state["distress_level"] in BYPASS_DISTRESS:
+            return None
+        text = normalize_text(state["user_input"])
+        if not text or len(text.split()) > self.max_words:
+            return None
+        key = (
+            state["current_emotion"],
+            state["distress_level"],
+            state["emotion_trend"],
+            state["last_bot_action"]
+        )
+        return key, text
+
+    def _embedding(self, text):
+        if self.similarity <= 0:
+            return None
+        if self.embed is None:
+            from inference_service import embed_texts
+            self.embed = embed_texts
+        return text_cache.get_or_compute(
+            "embedding", text, lambda t: self.embed([t])[0]
+        )
+
+    def _find(self, key, text, vector, now):
+        entry = self._entries.get((key, text))
+        if entry is not None and entry["expires"] > now:
+            return (key, text), entry
+
+        if vector is None:
+            return None, None
+
+        best, best_score = None, self.similarity
+        for other in self._buckets.get(key, ()):
+            candidate = self._entries[(key, other)]
+            if candidate["vector"] is None or candidate["expires"] <= now:
+                continue
+            score = sum(a * b for a, b in zip(vector, candidate["vector"]))
+            if score >= best_score:
+                best, best_score = (key, other), score
+        return best, self._entries.get(best)
+
+    def get(self, state, context=None):
+        cacheable = self._cacheable(state, context)
+        if cacheable is None:
+            self.bypassed += 1
+            return None
+
+        key, text = cacheable
+        vector = self._embedding(text)
+        now = time.monotonic()
+
+        with self._lock:
+            entry_key, entry = self._find(key, text, vector, now)
+            if entry is None or len(entry["replies"]) < self.min_variants:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(entry_key)
+            entry["turn"] = (entry["turn"] + 1) % len(entry["replies"])
+            self.hits += 1
+            return entry["replies"][entry["turn"]]
+
+    def put(self, state, reply, context=None):
+        cacheable = self._cacheable(state, context)
+        if cacheable is None or not reply:
+            return
+
+        key, text = cacheable
+        vector = self._embedding(text)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get((key, text))
+            if entry is None or entry["expires"] <= now:
+                entry = {"replies": [], "turn": 0, "vector": vector}
+                self._entries[(key, text)] = entry
+                self._buckets.setdefault(key, set()).add(text)
+
+            entry["expires"] = now + self.ttl
+            if reply not in entry["replies"]:
+                entry["replies"].append(reply)
+                if len(entry["replies"]) > self.variants:
+                    entry["replies"].pop(random.randrange(len(entry["replies"]) - 1))
+                # The reply just generated was the last one served
+                entry["turn"] = len(entry["replies"]) - 1
+            self._entries.move_to_end((key, text))
+
+            while len(self._entries) > self.maxsize:
+                (old_key, old_text), _ = self._entries.popitem(last=False)
+                self._buckets[old_key].discard(old_text)
+                if not self._buckets[old_key]:
+                    del self._buckets[old_key]
+                self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+response_cache = ResponseCache()
+
+Gauge("chat_llm_cache_entries", "Keys held by the LLM response cache", lambda: response_cache.stats()["size"])
+Counter(
+    "chat_llm_cache_total",
+    "LLM response cache lookups (hits / misses / bypassed) and evictions",
+    label="result",
+    collect=lambda: {k: response_cache.stats()[k] for k in ("hits", "misses", "bypassed", "evictions")}
+)
@@ -0,0 +1,152 @@
+# load_test.py
+"""
+End-to-end load test for /chat
+
+Drives many concurrent sessions with messages drawn from the intents
+dataset and reports throughput plus p50/p95/p99 latency per stage
+(client round trip and the server's Server-Timing stages).
+
+    # Against a running server
+    python load_test.py --url http://127.0.0.1:5000 --sessions 50 --turns 10
+
+    # Self-contained (fake Ollama + stub models + in-process server), for CI
+    python load_test.py --local --sessions 50 --turns 10 --max-p99-ms 2000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INTENTS_PATH = os.path.join(BASE_DIR, "data", "mental_health_intents.json")
+
+def load_messages():
+    with open(INTENTS_PATH, "r", encoding="utf-8") as f:
+        intents = json.load(f)["intents"]
+    return [p for intent in intents for p in intent.get("patterns", []) if p.strip()]
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+def parse_server_timing(header):
+    stages = {}
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if params.startswith("dur="):
+            stages[name] = float(params[4:])
+    return stages
+
+def start_local_stack(args):
+    """
+    Fake Ollama + stub inference backend + the Flask app, all in-process
+    """
+    os.environ.setdefault("INFERENCE_BACKEND", "stub")
+    os.chdir(BASE_DIR)
+
+    from fake_ollama import start_fake_ollama
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    ollama = start_fake_ollama(
+        latency_ms=args.llm_latency_ms,
+        tokens_per_sec=args.llm_tokens_per_sec,
+        failure_rate=args.llm_failure_rate
+    )
+
+    import local_llm
+    local_llm.OLLAMA_URL = f"http://127.0.0.1:{ollama.server_address[1]}/api/generate"
+
+    import server
+    httpd = make_server(
+        "127.0.0.1", 0, server.app, threaded=True, request_handler=QuietHandler
+    )
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{httpd.server_port}"
+
+def run_session(url, session_id, messages, turns, rng):
+    client = requests.Session()
+    results = []
+    for _ in range(turns):
+        started = time.perf_counter()
+        try:
+            resp = client.post(
+                f"{url}/chat",
+                json={"session_id": session_id, "message": rng.choice(messages)},
+                timeout=120
+            )
+            ok = resp.status_code == 200
+            stages = parse_server_timing(resp.headers.get("Server-Timing"))
+        except requests.RequestException:
+            ok, stages = False, {}
+        stages["client"] = (time.perf_counter() - started) * 1000.0
+        results.append((ok, stages))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for /chat")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--local", action="store_true",
+                        help="start a fake Ollama, stub models and the server in-process")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0)
+    parser.add_argument("--llm-tokens-per-sec", type=float, default=200.0)
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--max-p99-ms", type=float, default=None,
+                        help="exit non-zero if client p99 latency exceeds this")
+    parser.add_argument("--max-error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    url = start_local_stack(args) if args.local else args.url.rstrip("/")
+    messages = load_messages()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [
+            pool.submit(
+                run_session, url, f"load-{i}", messages, args.turns,
+                random.Random(args.seed + i)
+            )
+            for i in range(args.sessions)
+        ]
+        results = [r for f in futures for r in f.result()]
+    elapsed = time.perf_counter() - started
+
+    errors = sum(1 for ok, _ in results if not ok)
+    by_stage = {}
+    for ok, stages in results:
+        if ok:
+            for name, ms in stages.items():
+                by_stage.setdefault(name, []).append(ms)
+
+    print(f"requests    {len(results)}")
+    print(f"errors      {errors}")
+    print(f"elapsed     {elapsed:.2f}s")
+    print(f"throughput  {len(results) / elapsed:.1f} req/s\n")
+    print(f"{'stage':12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name in sorted(by_stage):
+        values = by_stage[name]
+        print(f"{name:12}{percentile(values, 50):10.1f}{percentile(values, 95):10.1f}{percentile(values, 99):10.1f}")
+
+    failed = errors / max(1, len(results)) > args.max_error_rate
+    if args.max_p99_ms is not None:
+        failed = failed or percentile(by_stage.get("client", []), 99) > args.max_p99_ms
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,327 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
 import requests
+from requests.adapters import HTTPAdapter
+
+# Shared helpers live in ml/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ml"))
+from metrics import stage_seconds
 
 OLLAMA_URL = "http://localhost:11434/api/generate"
 MODEL_NAME = "mistral"
 
-def generate_local_llm(prompt):
-    response = requests.post(
+# How long Ollama keeps the model (and its prompt cache) loaded between calls
+KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "10m")
+
+# --------------------
+# Client Config
+# --------------------
+CONNECT_TIMEOUT = float(os.environ.get("OLLAMA_CONNECT_TIMEOUT", 2))
+READ_TIMEOUT = float(os.environ.get("OLLAMA_READ_TIMEOUT", 30))
+MAX_INFLIGHT = int(os.environ.get("OLLAMA_MAX_INFLIGHT", 4))
+SLOT_WAIT = float(os.environ.get("OLLAMA_SLOT_WAIT", 1))
+BREAKER_FAILURES = int(os.environ.get("OLLAMA_BREAKER_FAILURES", 3))
+BREAKER_RESET = float(os.environ.get("OLLAMA_BREAKER_RESET", 30))
+
+class LLMUnavailable(Exception):
+    """
+    The LLM was skipped: circuit open or too many generations in flight
+    """
+
+class LLMCancelled(Exception):
+    """
+    The caller stopped waiting and the generation was abandoned
+    """
+
+# --------------------
+# Circuit Breaker
+# --------------------
+class CircuitBreaker:
+    """
+    Opens after ``failure_threshold`` consecutive failures and rejects
+    calls for ``reset_timeout`` seconds. After that it goes half-open and
+    lets a single probe through, failing everyone else fast: the probe's
+    success closes it, its failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=3, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        """
+        The state the call was admitted in (CLOSED or HALF_OPEN), or None.
+        A HALF_OPEN admission is the probe: its caller must end it with
+        record_success(), record_failure() or release_probe().
+        """
+        with self._lock:
+            state = self.state
+            if state == self.CLOSED:
+                return state
+            if state == self.OPEN or self._probing:
+                return None
+            self._probing = True
+            return state
+
+    def release_probe(self):
+        # The probe ended without an answer (no slot, cancelled, ...)
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+breaker = CircuitBreaker(BREAKER_FAILURES, BREAKER_RESET)
+
+# --------------------
+# Pooled Keep-alive Client
+# --------------------
+session = requests.Session()
+session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=MAX_INFLIGHT))
+session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=MAX_INFLIGHT))
+
+_slots = threading.BoundedSemaphore(MAX_INFLIGHT)
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+@contextmanager
+def generation_slot():
+    """
+    Gate a single Ollama call through the breaker and the in-flight limit
+    """
+    global _in_flight
+
+    admitted = breaker.allow()
+    if not admitted:
+        raise LLMUnavailable("circuit open")
+
+    try:
+        with stage_seconds.time("llm_wait"):
+            acquired = _slots.acquire(timeout=SLOT_WAIT)
+        if not acquired:
+            raise LLMUnavailable("too many generations in flight")
+
+        with _in_flight_lock:
+            _in_flight += 1
+        started = time.perf_counter()
+        try:
+            yield
+        except LLMCancelled:
+            raise  # not Ollama's fault
+        except Exception:
+            breaker.record_failure()
+            raise
+        else:
+            breaker.record_success()
+        finally:
+            stage_seconds.observe("llm", time.perf_counter() - started)
+            with _in_flight_lock:
+                _in_flight -= 1
+            _slots.release()
+    finally:
+        if admitted == CircuitBreaker.HALF_OPEN:
+            breaker.release_probe()
+
+# --------------------
+# Async Client (ASGI server)
+# --------------------
+_async_client = None
+_async_slots = None
+
+def get_async_client():
+    """
+    Shared httpx.AsyncClient and slot semaphore, created inside the
+    running event loop on first use
+    """
+    global _async_client, _async_slots
+
+    if _async_client is None:
+        import httpx
+
+        _async_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=MAX_INFLIGHT,
+                max_keepalive_connections=MAX_INFLIGHT
+            )
+        )
+        _async_slots = asyncio.Semaphore(MAX_INFLIGHT)
+    return _async_client
+
+@asynccontextmanager
+async def async_generation_slot():
+    global _in_flight
+
+    admitted = breaker.allow()
+    if not admitted:
+        raise LLMUnavailable("circuit open")
+
+    try:
+        try:
+            with stage_seconds.time("llm_wait"):
+                await asyncio.wait_for(_async_slots.acquire(), SLOT_WAIT)
+        except asyncio.TimeoutError:
+            raise LLMUnavailable("too many generations in flight")
+
+        with _in_flight_lock:
+            _in_flight += 1
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            breaker.record_failure()
+            raise
+        else:
+            breaker.record_success()
+        finally:
+            stage_seconds.observe("llm", time.perf_counter() - started)
+            with _in_flight_lock:
+                _in_flight -= 1
+            _async_slots.release()
+    finally:
+        if admitted == CircuitBreaker.HALF_OPEN:
+            breaker.release_probe()
+
+async def agenerate_local_llm(prompt, context=None, on_context=None):
+    """
+    Awaitable generate_local_llm() on a non-blocking HTTP client
+    """
+    client = get_async_client()
+
+    async with async_generation_slot():
+        response = await client.post(
+            OLLAMA_URL,
+            json=build_payload(prompt, False, context)
+        )
+        response.raise_for_status()
+        data = response.json()
+
+    if on_context and data.get("context"):
+        on_context(data["context"])
+    return data["response"].strip()
+
+async def close_async_client():
+    global _async_client
+
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+def circuit_state():
+    return {
+        "state": breaker.state,
+        "consecutive_failures": breaker.failures,
+        "in_flight": _in_flight,
+        "max_in_flight": MAX_INFLIGHT
+    }
+
+def build_payload(prompt, stream, context=None):
+    payload = {
+        "model": MODEL_NAME,
+        "prompt": prompt,
+        "stream": stream,
+        "keep_alive": KEEP_ALIVE
+    }
+    # Tokens of the conversation so far, as returned by the previous call
+    if context:
+        payload["context"] = context
+    return payload
+
+def generate_local_llm(prompt, stream=False, context=None, on_context=None, cancel=None):
+    """
+    ``context`` continues an earlier conversation; ``on_context`` is called
+    with the context Ollama returns so the next turn can continue from it.
+
+    ``cancel`` (a threading.Event) makes the call abandonable: the reply is
+    streamed internally and setting the event closes the connection at the
+    next chunk, which also stops Ollama, and raises LLMCancelled.
+    """
+    if stream:
+        return stream_local_llm(prompt, context, on_context, cancel)
+    if cancel is not None:
+        return "".join(stream_local_llm(prompt, context, on_context, cancel)).strip()
+
+    with generation_slot():
+        response = session.post(
+            OLLAMA_URL,
+            json=build_payload(prompt, False, context),
+            timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+        )
+
+        response.raise_for_status()
+        data = response.json()
+
+    if on_context and data.get("context"):
+        on_context(data["context"])
+    return data["response"].strip()
+
+def _check_cancelled(cancel):
+    if cancel is not None and cancel.is_set():
+        raise LLMCancelled("caller stopped waiting")
+
+def stream_local_llm(prompt, context=None, on_context=None, cancel=None):
+    """
+    Yield tokens as Ollama emits them
+    """
+    _check_cancelled(cancel)
+    with generation_slot(), session.post(
         OLLAMA_URL,
-        json={
-            "model": MODEL_NAME,
-            "prompt": prompt,
-            "stream": False
-        },
-        timeout=60
-    )
-
-    response.raise_for_status()
-    return response.json()["response"].strip()
+        json=build_payload(prompt, True, context),
+        stream=True,
+        timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+    ) as response:
+        response.raise_for_status()
+
+        started = False
+        for line in response.iter_lines():
+            _check_cancelled(cancel)
+            if not line:
+                continue
+
+            chunk = json.loads(line)
+            token = chunk.get("response", "")
+
+            # Match the non-streaming reply, which is stripped
+            if not started:
+                token = token.lstrip()
+                started = bool(token)
+
+            if token:
+                yield token
+
+            if chunk.get("done"):
+                if on_context and chunk.get("context"):
+                    on_context(chunk["context"])
+                break
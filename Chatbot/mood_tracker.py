@@ -1,14 +1,132 @@
 # mood_tracker.py
+"""
+Per-session mood history in a fixed-size ring buffer
+
+Emotion and distress are stored as small integer codes, with timestamps,
+in preallocated arrays. Counts per emotion, the distress histogram and the
+dominant emotion are updated on every log() and on every eviction from the
+buffer, so summaries never depend on how long the session has been running.
+"""
 import datetime
+import os
+import sys
+import time
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ml"))
+from emotion_analysis import analyze_text
+
+# At least one entry: the ring buffer indexes modulo its size
+MOOD_HISTORY_SIZE = max(1, int(os.environ.get("MOOD_HISTORY_SIZE", 200)))
+
+# Mapped categories from emotion_model.EMOTION_MAP; anything else is "other"
+EMOTIONS = (
+    "neutral", "sadness", "anxiety", "frustration",
+    "positive", "emotional_exhaustion", "other"
+)
+DISTRESS_LEVELS = ("low", "moderate", "high", "other")
+
+_EMOTION_CODES = {name: code for code, name in enumerate(EMOTIONS)}
+_DISTRESS_CODES = {name: code for code, name in enumerate(DISTRESS_LEVELS)}
+
+class MoodTracker:
+    __slots__ = (
+        "capacity", "_emotions", "_distress", "_times",
+        "_next", "_size", "total", "sadness_streak",
+        "emotion_counts", "distress_counts", "_dominant"
+    )
+
+    def __init__(self, capacity=MOOD_HISTORY_SIZE):
+        if capacity < 1:
+            raise ValueError(f"capacity must be at least 1, got {capacity}")
+        self.capacity = capacity
+        self._emotions = array("B", bytes(capacity))
+        self._distress = array("B", bytes(capacity))
+        self._times = array("d", bytes(8 * capacity))
+        self._next = 0     # slot the next entry is written to
+        self._size = 0
+        self.total = 0     # entries logged since the tracker was created
+        self.sadness_streak = 0
+
+        # Over the entries currently in the buffer
+        self.emotion_counts = [0] * len(EMOTIONS)
+        self.distress_counts = [0] * len(DISTRESS_LEVELS)
+        self._dominant = None
+
+    def log(self, emotion, distress_level, timestamp=None):
+        e = _EMOTION_CODES.get(emotion, _EMOTION_CODES["other"])
+        d = _DISTRESS_CODES.get(distress_level, _DISTRESS_CODES["other"])
+        i = self._next
+
+        if self._size == self.capacity:
+            # Oldest entry is overwritten: take it out of the rollups
+            old = self._emotions[i]
+            self.emotion_counts[old] -= 1
+            self.distress_counts[self._distress[i]] -= 1
+            if old == self._dominant:
+                self._dominant = max(
+                    range(len(EMOTIONS)), key=self.emotion_counts.__getitem__
+                )
+        else:
+            self._size += 1
+
+        self._emotions[i] = e
+        self._distress[i] = d
+        self._times[i] = time.time() if timestamp is None else timestamp
+        self._next = (i + 1) % self.capacity
+        self.total += 1
+        self.sadness_streak = self.sadness_streak + 1 if emotion == "sadness" else 0
+
+        self.emotion_counts[e] += 1
+        self.distress_counts[d] += 1
+        if self._dominant is None or self.emotion_counts[e] > self.emotion_counts[self._dominant]:
+            self._dominant = e
+
+    def __len__(self):
+        return self._size
+
+    def dominant_emotion(self):
+        return EMOTIONS[self._dominant] if self._size else None
+
+    def history(self, limit=None):
+        """
+        Up to ``limit`` most recent entries, oldest first
+        """
+        count = self._size if limit is None else min(limit, self._size)
+        start = (self._next - count) % self.capacity
+        entries = []
+        for k in range(count):
+            i = (start + k) % self.capacity
+            entries.append({
+                "time": datetime.datetime.fromtimestamp(self._times[i]).strftime("%H:%M:%S"),
+                "emotion": EMOTIONS[self._emotions[i]],
+                "distress_level": DISTRESS_LEVELS[self._distress[i]]
+            })
+        return entries
+
+    def summary(self):
+        return {
+            "entries": self._size,
+            "total_logged": self.total,
+            "sadness_streak": self.sadness_streak,
+            "dominant_emotion": self.dominant_emotion(),
+            "emotion_counts": {
+                name: n for name, n in zip(EMOTIONS, self.emotion_counts) if n
+            },
+            "distress_counts": {
+                name: n for name, n in zip(DISTRESS_LEVELS, self.distress_counts) if n
+            }
+        }
+
+    def clear(self):
+        self.__init__(self.capacity)
 
-mood_log = []
+def log_mood(tracker, emotion, distress_level, text):
+    tracker.log(emotion, distress_level)
 
-def log_mood(emotion, distress_level):
-    mood_log.append({
-        "time": datetime.datetime.now().strftime("%H:%M:%S"),
-        "emotion": emotion,
-        "distress_level": distress_level
-    })
+    # Persisted row matches analyze_text(): raw GoEmotions label, model
+    # sentiment and classify_risk(), plus this session's sadness streak
+    analyze_text(text, sadness_streak=tracker.sadness_streak)
 
-def get_mood_history():
-    return mood_log
+def get_mood_history(tracker, limit=None):
+    return tracker.history(limit)
@@ -0,0 +1,216 @@
+# prefork.py
+"""
+Prefork launcher for server.py
+
+The master loads and warms the models once, then forks the workers. They
+inherit the weights copy-on-write and all accept on the same listening
+socket. The master restarts workers that die and prints each worker's
+resident memory, split into the part shared with the other processes
+and the part private to it.
+
+    python prefork.py --workers 4 --torch-threads 2
+"""
+import argparse
+import gc
+import os
+import signal
+import sys
+import time
+
+# Linux smaps_rollup fields (kB)
+MEMORY_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+def memory_usage(pid):
+    """
+    RSS / PSS / shared / private MB for ``pid`` (None where unavailable)
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+
+    kb = {}
+    for line in lines:
+        name, _, rest = line.partition(":")
+        if name in MEMORY_FIELDS:
+            kb[name] = int(rest.split()[0])
+
+    return {
+        "rss": kb.get("Rss", 0) / 1024,
+        "pss": kb.get("Pss", 0) / 1024,
+        "shared": (kb.get("Shared_Clean", 0) + kb.get("Shared_Dirty", 0)) / 1024,
+        "private": (kb.get("Private_Clean", 0) + kb.get("Private_Dirty", 0)) / 1024
+    }
+
+def print_memory(workers):
+    print(f"{'process':<16}{'rss MB':>10}{'pss MB':>10}{'shared MB':>12}{'private MB':>12}")
+    for label, pid in [("master", os.getpid())] + [
+        (f"worker {slot}", pid) for slot, pid in sorted(workers.items())
+    ]:
+        usage = memory_usage(pid)
+        if usage is None:
+            print(f"{label:<16}{'n/a':>10}")
+            continue
+        print(
+            f"{label:<16}{usage['rss']:>10.1f}{usage['pss']:>10.1f}"
+            f"{usage['shared']:>12.1f}{usage['private']:>12.1f}"
+        )
+    sys.stdout.flush()
+
+def set_torch_threads(count):
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(count)
+
+def database_engines():
+    # Engines the app has created so far: the session store's and the
+    # shared one in Database/database.py (usually the same object)
+    engines = {}
+    conversation = sys.modules.get("conversation")
+    store_engine = getattr(getattr(conversation, "session_store", None), "engine", None)
+    if store_engine is not None:
+        engines[id(store_engine)] = store_engine
+    database = sys.modules.get("Database.database")
+    if database is not None:
+        engines[id(database.engine)] = database.engine
+    return list(engines.values())
+
+def reset_after_fork():
+    """
+    SQLite connections must not be used across fork(): give the worker its
+    own pools and leave the inherited connections to the master
+    """
+    for engine in database_engines():
+        engine.dispose(close=False)
+
+class Master:
+    def __init__(self, server, workers, torch_threads, report_every):
+        self.server = server
+        self.size = workers
+        self.torch_threads = torch_threads
+        self.report_every = report_every
+        self.workers = {}       # slot -> pid
+        self.started_at = {}    # slot -> last fork time
+        self.stopping = False
+
+    def spawn(self, slot):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            reset_after_fork()
+            set_torch_threads(self.torch_threads)
+            try:
+                self.server.serve_forever()
+            finally:
+                os._exit(0)
+
+        self.workers[slot] = pid
+        self.started_at[slot] = time.monotonic()
+        print(f"Worker {slot} started (pid {pid})")
+
+    def stop(self, *_):
+        self.stopping = True
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        for slot in range(self.size):
+            self.spawn(slot)
+
+        # First report once the workers are up, then every report_every
+        next_report = time.monotonic() + min(5.0, self.report_every)
+        while not self.stopping:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid = 0
+
+            if pid:
+                slot = next((s for s, p in self.workers.items() if p == pid), None)
+                if slot is not None and not self.stopping:
+                    print(f"Worker {slot} (pid {pid}) exited with status {status}, restarting")
+                    # Don't spin if a worker dies right after starting
+                    if time.monotonic() - self.started_at[slot] < 1.0:
+                        time.sleep(1.0)
+                    self.spawn(slot)
+                continue
+
+            if self.report_every > 0 and time.monotonic() >= next_report:
+                print_memory(self.workers)
+                next_report = time.monotonic() + self.report_every
+
+            time.sleep(0.2)
+
+        self.shutdown()
+
+    def shutdown(self):
+        for pid in self.workers.values():
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in self.workers.values():
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        self.server.server_close()
+        print("Workers stopped")
+
+def main():
+    cpus = os.cpu_count() or 1
+
+    parser = argparse.ArgumentParser(description="Prefork launcher for server.py")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WORKERS", cpus)))
+    parser.add_argument("--torch-threads", type=int, default=None,
+                        help="intra-op threads per worker (default: cores / workers)")
+    parser.add_argument("--report-every", type=float, default=60.0,
+                        help="seconds between memory reports (0 = off)")
+    args = parser.parse_args()
+
+    torch_threads = args.torch_threads or max(1, cpus // args.workers)
+
+    # Warm up single-threaded: forking after torch has started an OpenMP
+    # thread pool can deadlock the children
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    os.environ.setdefault("MKL_NUM_THREADS", "1")
+
+    from werkzeug.serving import make_server
+
+    # server first: its imports put ml/ on sys.path
+    from server import app
+    from inference_service import EMOTION
+    from model_registry import warmup
+    from response import response_models
+    from session_store import SESSION_STORE
+
+    set_torch_threads(1)
+    for name, seconds in warmup([EMOTION, *response_models()]).items():
+        print(f"Loaded {name} in {seconds:.2f}s")
+
+    if args.workers > 1 and SESSION_STORE == "memory":
+        print("Warning: SESSION_STORE=memory is per worker; use sqlite to share sessions")
+
+    # The session store may have connected while loading; workers open
+    # their own connections
+    for engine in database_engines():
+        engine.dispose()
+
+    # Everything allocated so far is shared with the workers: keep the
+    # collector from touching (and so copying) those pages
+    gc.collect()
+    gc.freeze()
+
+    server = make_server(args.host, args.port, app, threaded=True)
+    print(f"Serving on {args.host}:{args.port} with {args.workers} workers "
+          f"x {torch_threads} torch threads")
+
+    master = Master(server, args.workers, torch_threads, args.report_every)
+    master.run()
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,109 @@
+import asyncio
 import json
+import os
 import random
-from collections import Counter
-from local_llm import generate_local_llm
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from local_llm import LLMUnavailable, agenerate_local_llm, generate_local_llm
+
+# Shared inference helpers live in ml/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ml"))
+from inference_service import EMBEDDING
+from metrics import fallbacks, stage_seconds
+from llm_cache import response_cache
+from response_index import load_index
 
 # ====================
 # CONFIG
 # ====================
 USE_LOCAL_LLM = True
 
+# Response focuses that go to the local LLM
+LLM_FOCUSES = [
+    "use_context",
+    "continue_coping",
+    "ground_and_support",
+    "validate_and_reflect",
+    "general_support"
+]
+
+# Latency budget for the LLM in seconds (0 = wait for it, no deadline).
+# Short "use_context" replies get the tighter budget.
+LLM_DEADLINE = float(os.environ.get("LLM_DEADLINE", 8))
+LLM_SHORT_DEADLINE = float(os.environ.get("LLM_SHORT_DEADLINE", 3))
+
+# What to do with an LLM call that misses its deadline: "discard" stops it;
+# "cache" lets it finish (holding its worker and Ollama slot until then) and
+# keeps the reply for the next turn with the same emotion, distress and text
+LATE_LLM_RESULTS = os.environ.get("LATE_LLM_RESULTS", "discard")
+
+_llm_pool = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("LLM_WORKERS", 8)),
+    thread_name_prefix="llm"
+)
+
+class LateReplies:
+    """
+    LLM replies that finished after their deadline, kept for the next
+    identical turn. Keys are exact (emotion, distress, text, session) tuples:
+    unlike ResultCache nothing is normalized, so "user-1" and "user1" or a
+    text that happens to end in a session id never share an entry.
+    """
+
+    def __init__(self, maxsize=256, ttl=600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, reply = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return reply
+
+    def set(self, key, reply):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, reply)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+late_replies = LateReplies()
+
+# Reuse the Ollama context of a session for this many idle seconds
+LLM_CONTEXT_IDLE = float(os.environ.get("LLM_CONTEXT_IDLE", 900))
+
+# Pick bank replies by similarity to the user's message when the
+# precomputed index (response_index.py) is available
+USE_RESPONSE_INDEX = os.environ.get("USE_RESPONSE_INDEX", "1") == "1"
+
 # --------------------
 # Load Response Bank
 # --------------------
 with open("data/mental_health_response_bank.json", "r", encoding="utf-8") as f:
     RESPONSE_BANK = json.load(f)
 
+RESPONSE_INDEX = load_index(RESPONSE_BANK) if USE_RESPONSE_INDEX else None
+
+def response_models():
+    """
+    Models the reply path loads besides the emotion model, for warmup():
+    bank ranking and similarity caching embed the user's message
+    """
+    if RESPONSE_INDEX is not None or response_cache.similarity > 0:
+        return [EMBEDDING]
+    return []
+
 # --------------------
 # Response Style Rotation
 # --------------------
@@ -68,12 +158,22 @@ def build_prompt_state(
 # --------------------
 # Build LLM Prompt (Mental Health Tuned)
 # --------------------
-def build_llm_prompt(state):
-    return f"""
+LLM_INTRO = """
 You are a supportive, empathetic mental health assistant.
 You are NOT a medical professional.
 Do NOT diagnose or give medical advice.
+"""
+
+LLM_GUIDELINES = """
+Guidelines:
+- Acknowledge the user's feelings
+- Be calm, kind, and non-judgmental
+- Ask at most ONE gentle follow-up question
+- Keep the response concise and human
+"""
 
+def build_turn_prompt(state):
+    return f"""
 User message:
 {state['user_input']}
 
@@ -83,14 +183,74 @@ Previous emotion: {state['last_emotion']}
 Recent emotional trend: {state['emotion_trend']}
 Conversation turn: {state['turn_count']}
 Last assistant action: {state['last_bot_action']}
-
-Guidelines:
-- Acknowledge the user's feelings
-- Be calm, kind, and non-judgmental
-- Ask at most ONE gentle follow-up question
-- Keep the response concise and human
 """
 
+def build_llm_prompt(state):
+    return LLM_INTRO + build_turn_prompt(state) + LLM_GUIDELINES
+
+# --------------------
+# Per-session Ollama Context
+# --------------------
+def llm_request(state, llm_session=None):
+    """
+    Prompt and context for this turn. While the session holds a fresh
+    Ollama context only the new turn is sent: the preamble and earlier
+    turns are already in that context.
+    """
+    with stage_seconds.time("prompt"):
+        if llm_session is not None:
+            context = llm_session.get("llm_context")
+            last_used = llm_session.get("llm_context_at") or 0
+            if context and time.time() - last_used < LLM_CONTEXT_IDLE:
+                return build_turn_prompt(state), context
+            llm_session["llm_context"] = None
+
+        return build_llm_prompt(state), None
+
+def llm_failed(error):
+    # Fallback reason for an LLM call that raised
+    fallbacks.inc("llm_unavailable" if isinstance(error, LLMUnavailable) else "llm_error")
+
+def save_llm_context(llm_session, captured):
+    if llm_session is not None and captured:
+        llm_session["llm_context"] = captured[-1]
+        llm_session["llm_context_at"] = time.time()
+
+# --------------------
+# Dataset-grounded Response
+# --------------------
+SAFE_FALLBACK = (
+    "I'm here with you. "
+    "Would you like to tell me a bit more about what's been going on?"
+)
+
+def dataset_response(emotion, turn_count, user_text=None):
+    with stage_seconds.time("fallback"):
+        return _dataset_response(emotion, turn_count, user_text)
+
+def _dataset_response(emotion, turn_count, user_text=None):
+    style = get_response_style(turn_count)
+    emotion_block = RESPONSE_BANK.get(emotion, {})
+    style_responses = emotion_block.get(style)
+
+    if style_responses:
+        if RESPONSE_INDEX is not None and user_text:
+            try:
+                return RESPONSE_INDEX.best_response(user_text, emotion, style)[0]
+            except Exception:
+                pass  # safe fallback
+        return random.choice(style_responses)
+
+    # ---- Final safe fallback ----
+    return SAFE_FALLBACK
+
+def served_fallback(reply):
+    # Counted where the fallback is actually returned: in a race it is
+    # computed whether or not the LLM wins
+    if reply == SAFE_FALLBACK:
+        fallbacks.inc("empty_bank")
+    return reply
+
 # --------------------
 # Final Response Generator (Single Source of Truth)
 # --------------------
@@ -101,8 +261,13 @@ def generate_response(
     user_text,
     last_emotion,
     emotion_history=None,
-    last_bot_action=None
+    last_bot_action=None,
+    llm_session=None
 ):
+    """
+    ``llm_session`` is an optional mutable mapping (e.g. the server-side
+    session) where the Ollama context is kept between turns
+    """
     prompt_state = build_prompt_state(
         user_text,
         emotion,
@@ -116,29 +281,235 @@ def generate_response(
     focus = decide_response_focus(prompt_state)
 
     # ---- LLM-powered generation ----
-    if USE_LOCAL_LLM and focus in [
-        "use_context",
-        "continue_coping",
-        "ground_and_support",
-        "validate_and_reflect",
-        "general_support"
-    ]:
+    if USE_LOCAL_LLM and focus in LLM_FOCUSES:
+        prompt, context = llm_request(prompt_state, llm_session)
+        cached = response_cache.get(prompt_state, context)
+        if cached is not None:
+            return cached
+
+        deadline = LLM_SHORT_DEADLINE if focus == "use_context" else LLM_DEADLINE
+        if deadline > 0:
+            return race_llm(prompt_state, deadline, prompt, context, llm_session)
+
         try:
-            prompt = build_llm_prompt(prompt_state)
-            return generate_local_llm(prompt)
-        except Exception:
-            pass  # safe fallback
+            captured = []
+            reply = generate_local_llm(prompt, context=context, on_context=captured.append)
+            save_llm_context(llm_session, captured)
+            response_cache.put(prompt_state, reply, context)
+            return reply
+        except Exception as e:
+            llm_failed(e)  # safe fallback
 
-    # ---- Dataset-grounded response ----
-    style = get_response_style(turn_count)
-    emotion_block = RESPONSE_BANK.get(emotion, {})
-    style_responses = emotion_block.get(style)
+    return served_fallback(dataset_response(emotion, turn_count, user_text))
 
-    if style_responses:
-        return random.choice(style_responses)
+# --------------------
+# Deadline Race (LLM vs Response Bank)
+# --------------------
+def late_reply_key(state, context=None, llm_session=None):
+    """
+    A reply generated with a session's Ollama context is only reused within
+    that session, and not at all if the session has no id
+    """
+    key = (state["current_emotion"], state["distress_level"], state["user_input"])
+    if not context:
+        return key + (None,)
+    session_id = llm_session.get("session_id") if llm_session is not None else None
+    return None if session_id is None else key + (session_id,)
 
-    # ---- Final safe fallback ----
-    return (
-        "I'm here with you. "
-        "Would you like to tell me a bit more about what's been going on?"
+def remember_late_reply(key):
+    def remember(f):
+        if not f.cancelled() and f.exception() is None:
+            late_replies.set(key, f.result())
+    return remember
+
+def race_llm(prompt_state, deadline, prompt, context=None, llm_session=None):
+    """
+    Run the LLM in the background and return its reply if it lands within
+    ``deadline`` seconds; otherwise return the dataset reply
+    """
+    key = late_reply_key(prompt_state, context, llm_session)
+    late = late_replies.get(key) if key is not None else None
+    if late is not None:
+        return late
+
+    captured = []
+    cancel = threading.Event()
+    start = time.monotonic()
+    future = _llm_pool.submit(
+        generate_local_llm, prompt, context=context,
+        on_context=captured.append, cancel=cancel
+    )
+
+    # Computed while the LLM is working
+    fallback = dataset_response(
+        prompt_state["current_emotion"],
+        prompt_state["turn_count"],
+        prompt_state["user_input"]
+    )
+
+    try:
+        # The deadline runs from submit, not from after the fallback
+        reply = future.result(timeout=max(0.0, deadline - (time.monotonic() - start)))
+        save_llm_context(llm_session, captured)
+        response_cache.put(prompt_state, reply, context)
+        return reply
+    except TimeoutError:
+        fallbacks.inc("llm_timeout")
+        if LATE_LLM_RESULTS == "cache" and key is not None:
+            future.add_done_callback(remember_late_reply(key))
+        else:
+            # Frees the worker and the Ollama slot instead of finishing a
+            # reply nobody will read
+            cancel.set()
+            future.cancel()
+    except Exception as e:
+        llm_failed(e)  # safe fallback
+
+    return served_fallback(fallback)
+
+# --------------------
+# Async Response Generator (ASGI server)
+# --------------------
+async def agenerate_response(
+    emotion,
+    distress_level,
+    turn_count,
+    user_text,
+    last_emotion,
+    emotion_history=None,
+    last_bot_action=None,
+    llm_session=None,
+    executor=None
+):
+    """
+    asyncio twin of generate_response(): the LLM call is awaited on a
+    non-blocking client; the dataset reply and cache lookups (embeddings,
+    similarity scan) run on ``executor``
+    """
+    loop = asyncio.get_running_loop()
+
+    prompt_state = build_prompt_state(
+        user_text,
+        emotion,
+        distress_level,
+        last_emotion,
+        emotion_history or [],
+        turn_count,
+        last_bot_action
     )
+
+    focus = decide_response_focus(prompt_state)
+    fallback = None
+
+    # ---- LLM-powered generation ----
+    if USE_LOCAL_LLM and focus in LLM_FOCUSES:
+        prompt, context = llm_request(prompt_state, llm_session)
+        cached = await loop.run_in_executor(
+            executor, response_cache.get, prompt_state, context
+        )
+        if cached is not None:
+            return cached
+
+        key = late_reply_key(prompt_state, context, llm_session)
+        late = late_replies.get(key) if key is not None else None
+        if late is not None:
+            return late
+
+        # Computed while the LLM is working
+        fallback = loop.run_in_executor(
+            executor, dataset_response, emotion, turn_count, user_text
+        )
+
+        deadline = LLM_SHORT_DEADLINE if focus == "use_context" else LLM_DEADLINE
+        captured = []
+        task = asyncio.ensure_future(
+            agenerate_local_llm(prompt, context=context, on_context=captured.append)
+        )
+
+        try:
+            reply = await asyncio.wait_for(
+                asyncio.shield(task), deadline if deadline > 0 else None
+            )
+            fallback.cancel()
+            save_llm_context(llm_session, captured)
+            await loop.run_in_executor(
+                executor, response_cache.put, prompt_state, reply, context
+            )
+            return reply
+        except asyncio.TimeoutError:
+            fallbacks.inc("llm_timeout")
+            if LATE_LLM_RESULTS == "cache" and key is not None:
+                task.add_done_callback(remember_late_reply(key))
+            else:
+                task.cancel()
+        except Exception as e:
+            llm_failed(e)  # safe fallback
+
+    if fallback is None:
+        fallback = loop.run_in_executor(
+            executor, dataset_response, emotion, turn_count, user_text
+        )
+    return served_fallback(await fallback)
+
+# --------------------
+# Streaming Response Generator
+# --------------------
+def stream_response(
+    emotion,
+    distress_level,
+    turn_count,
+    user_text,
+    last_emotion,
+    emotion_history=None,
+    last_bot_action=None,
+    llm_session=None,
+    on_truncated=None
+):
+    """
+    Same decisions as generate_response(), but yields the reply in pieces
+    as the LLM produces them. Falls back to a single dataset reply if the
+    LLM fails before sending anything; if it fails after, the partial reply
+    stands and ``on_truncated(error)`` is called.
+    """
+    prompt_state = build_prompt_state(
+        user_text,
+        emotion,
+        distress_level,
+        last_emotion,
+        emotion_history or [],
+        turn_count,
+        last_bot_action
+    )
+
+    focus = decide_response_focus(prompt_state)
+
+    # ---- LLM-powered generation ----
+    if USE_LOCAL_LLM and focus in LLM_FOCUSES:
+        prompt, context = llm_request(prompt_state, llm_session)
+        cached = response_cache.get(prompt_state, context)
+        if cached is not None:
+            yield cached
+            return
+
+        parts = []
+        try:
+            captured = []
+            for token in generate_local_llm(
+                prompt, stream=True, context=context, on_context=captured.append
+            ):
+                parts.append(token)
+                yield token
+            save_llm_context(llm_session, captured)
+            response_cache.put(prompt_state, "".join(parts).strip(), context)
+        except Exception as e:
+            if not parts:
+                llm_failed(e)  # safe fallback
+            else:
+                fallbacks.inc("llm_truncated")
+                if on_truncated is not None:
+                    on_truncated(e)
+
+        if parts:
+            return
+
+    yield served_fallback(dataset_response(emotion, turn_count, user_text))
@@ -1,18 +1,16 @@
+import hashlib
 import json
-from emotion_model import detect_emotion
+import os
+from emotion_model import detect_emotions
+from inference_service import EMOTION_MODEL_ID
+from model_registry import INFERENCE_BACKEND
 
-with open("data/mental_health_intents.json", "r") as f:
-    data = json.load(f)
+INTENTS_PATH = "data/mental_health_intents.json"
+BANK_PATH = "data/mental_health_response_bank.json"
 
-intents = data["intents"]
-all_responses = []
-
-for intent in intents:
-    for r in intent.get("responses", []):
-        all_responses.append({
-            "tag": intent["tag"],
-            "text": r
-        })
+# Content hash -> emotion, so unchanged responses are never re-classified
+CACHE_PATH = "data/.response_bank_cache.json"
+BATCH_SIZE = 32
 
 TAG_TO_EMOTION = {
     "greeting": "neutral",
@@ -27,12 +25,6 @@ TAG_TO_EMOTION = {
     "lonely": "sadness"
 }
 
-def get_emotion(tag, text):
-    if tag in TAG_TO_EMOTION:
-        return TAG_TO_EMOTION[tag]
-    emotion, _ = detect_emotion(text)
-    return emotion
-
 def detect_style(text):
     t = text.lower()
 
@@ -47,24 +39,77 @@ def detect_style(text):
 
     return "encouragement"
 
-response_bank = {}
-
-for item in all_responses:
-    text = item["text"]
-    tag = item["tag"]
-
-    emotion = get_emotion(tag, text)
-    style = detect_style(text)
-
-    response_bank.setdefault(emotion, {})
-    response_bank[emotion].setdefault(style, [])
-    response_bank[emotion][style].append(text)
-
-for emotion in response_bank:
-    for style in response_bank[emotion]:
-        response_bank[emotion][style] = list(
-            set(response_bank[emotion][style])
+def content_hash(text):
+    # The model and backend are part of the key: switching either (e.g.
+    # stub labels from a CI run) re-classifies everything
+    key = f"{INFERENCE_BACKEND}\n{EMOTION_MODEL_ID}\n{text}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+def load_cache():
+    if not os.path.exists(CACHE_PATH):
+        return {}
+    with open(CACHE_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def classify_missing(texts, cache):
+    """
+    Classify (in batches) every text whose hash is not cached yet
+    """
+    missing = [t for t in dict.fromkeys(texts) if content_hash(t) not in cache]
+
+    for start in range(0, len(missing), BATCH_SIZE):
+        batch = missing[start:start + BATCH_SIZE]
+        for text, (emotion, _) in zip(batch, detect_emotions(batch)):
+            cache[content_hash(text)] = emotion
+
+    return len(missing)
+
+def build_response_bank():
+    with open(INTENTS_PATH, "r") as f:
+        data = json.load(f)
+
+    all_responses = [
+        {"tag": intent["tag"], "text": r}
+        for intent in data["intents"]
+        for r in intent.get("responses", [])
+    ]
+
+    untagged = [
+        item["text"] for item in all_responses
+        if item["tag"] not in TAG_TO_EMOTION
+    ]
+
+    cache = load_cache()
+    classified = classify_missing(untagged, cache)
+
+    # Insertion order follows the intents file, so rebuilds are stable
+    response_bank = {}
+
+    for item in all_responses:
+        text = item["text"]
+        tag = item["tag"]
+
+        emotion = TAG_TO_EMOTION.get(tag) or cache[content_hash(text)]
+        style = detect_style(text)
+
+        responses = response_bank.setdefault(emotion, {}).setdefault(style, [])
+        if text not in responses:
+            responses.append(text)
+
+    with open(BANK_PATH, "w") as f:
+        json.dump(response_bank, f, indent=2)
+
+    # Only keep hashes of responses that still exist
+    live = {content_hash(t) for t in untagged}
+    with open(CACHE_PATH, "w", encoding="utf-8") as f:
+        json.dump(
+            {h: e for h, e in cache.items() if h in live},
+            f, indent=2, sort_keys=True
         )
 
-with open("data/mental_health_response_bank.json", "w") as f:
-    json.dump(response_bank, f, indent=2)
+    return response_bank, classified
+
+if __name__ == "__main__":
+    bank, classified = build_response_bank()
+    total = sum(len(v) for styles in bank.values() for v in styles.values())
+    print(f"Wrote {total} responses ({classified} newly classified)")
@@ -0,0 +1,111 @@
+# response_index.py
+"""
+Precomputed embedding index over RESPONSE_BANK
+
+Build it offline (after the response bank changes):
+
+    python response_index.py
+
+Every response is embedded once into a contiguous float32 matrix that is
+memory-mapped at startup. Responses of one emotion/style sit in one row
+slice, so picking the reply closest to the user's message is a single
+matrix-vector product over that slice.
+"""
+import hashlib
+import json
+import os
+import sys
+import warnings
+
+import numpy as np
+
+# Shared inference helpers live in ml/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ml"))
+from inference_service import EMBEDDING_MODEL_ID, embed_texts
+from result_cache import text_cache
+
+MATRIX_PATH = "data/response_index.npy"
+META_PATH = "data/response_index.json"
+BATCH_SIZE = 64
+
+def bank_fingerprint(bank):
+    payload = json.dumps(bank, sort_keys=True) + EMBEDDING_MODEL_ID
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def build_index(bank):
+    texts = []
+    slices = {}
+    for emotion, styles in bank.items():
+        for style, responses in styles.items():
+            slices.setdefault(emotion, {})[style] = [len(texts), len(texts) + len(responses)]
+            texts.extend(responses)
+
+    vectors = []
+    for start in range(0, len(texts), BATCH_SIZE):
+        vectors.extend(embed_texts(texts[start:start + BATCH_SIZE]))
+
+    matrix = np.ascontiguousarray(np.asarray(vectors, dtype=np.float32))
+    np.save(MATRIX_PATH, matrix)
+
+    with open(META_PATH, "w", encoding="utf-8") as f:
+        json.dump({
+            "model": EMBEDDING_MODEL_ID,
+            "fingerprint": bank_fingerprint(bank),
+            "texts": texts,
+            "slices": slices
+        }, f, indent=2)
+
+    return matrix.shape
+
+class ResponseIndex:
+    def __init__(self, matrix, meta):
+        self.matrix = matrix
+        self.texts = meta["texts"]
+        self.slices = meta["slices"]
+
+    def best_response(self, user_text, emotion, style, k=1):
+        """
+        Top-``k`` responses of the emotion/style slice by cosine similarity
+        to ``user_text``, best first. Empty if the slice doesn't exist.
+        """
+        bounds = self.slices.get(emotion, {}).get(style)
+        if not bounds or bounds[0] == bounds[1]:
+            return []
+
+        start, end = bounds
+        query = np.asarray(
+            text_cache.get_or_compute("embedding", user_text, lambda t: embed_texts([t])[0]),
+            dtype=np.float32
+        )
+        scores = self.matrix[start:end] @ query
+
+        k = min(k, end - start)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [self.texts[start + i] for i in top]
+
+def load_index(bank):
+    """
+    Memory-map the index, or return None if it is missing or out of date
+    """
+    if not (os.path.exists(MATRIX_PATH) and os.path.exists(META_PATH)):
+        return None
+
+    with open(META_PATH, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+
+    if meta.get("fingerprint") != bank_fingerprint(bank):
+        warnings.warn(
+            "Response index is stale; run response_index.py to rebuild it",
+            RuntimeWarning
+        )
+        return None
+
+    return ResponseIndex(np.load(MATRIX_PATH, mmap_mode="r"), meta)
+
+if __name__ == "__main__":
+    with open("data/mental_health_response_bank.json", "r", encoding="utf-8") as f:
+        bank = json.load(f)
+
+    rows, dim = build_index(bank)
+    print(f"Indexed {rows} responses ({dim} dims) into {MATRIX_PATH}")
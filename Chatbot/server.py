@@ -1,12 +1,47 @@
-from flask import Flask, request, jsonify
-from response import generate_response
+import json
+import time
+from flask import Flask, Response, request, jsonify, stream_with_context
+from response import generate_response, response_models, stream_response
+from batch_chat import chat_batch
 from emotion_model import detect_emotion
 from distress_scoring import get_distress_level
+from conversation import (
+    finish_turn,
+    get_session,
+    record_emotion,
+    reset_session,
+    response_kwargs,
+    server_timing,
+    session_stats
+)
+from local_llm import circuit_state
+from llm_cache import response_cache
+from inference_service import EMOTION
+from model_registry import warmup
+from admission import Overloaded, admission, distress_priority
+from metrics import CONTENT_TYPE, render as render_metrics, stage_seconds
 
 app = Flask(__name__)
 
-# In-memory session store (hackathon-safe)
-sessions = {}
+def classify_turn(user_text):
+    # ---- Emotion pipeline (also sets the queue priority) ----
+    with stage_seconds.time("emotion"):
+        emotion, score = detect_emotion(user_text)
+    with stage_seconds.time("distress"):
+        distress = get_distress_level(emotion, score)
+    return emotion, distress
+
+def start_turn(session_id, emotion):
+    session = get_session(session_id)
+    record_emotion(session, emotion)
+    return session
+
+@app.errorhandler(Overloaded)
+def overloaded(e):
+    resp = jsonify({"error": "busy", "reason": e.reason, "retry_after": e.retry_after})
+    resp.status_code = 503
+    resp.headers["Retry-After"] = str(e.retry_after)
+    return resp
 
 @app.route("/chat", methods=["POST"])
 def chat():
@@ -17,50 +52,166 @@ def chat():
     if not user_text:
         return jsonify({"response": "Please say something so I can help."})
 
-    # Initialize session memory
-    if session_id not in sessions:
-        sessions[session_id] = {
-            "turn_count": 0,
-            "last_emotion": None,
-            "emotion_history": [],
-            "last_bot_action": None
+    started = time.perf_counter()
+    emotion, distress = classify_turn(user_text)
+    classified = time.perf_counter()
+
+    # ---- Generate response (most distressed first under load) ----
+    with admission.admit(distress_priority(distress)):
+        admitted = time.perf_counter()
+        session = start_turn(session_id, emotion)
+        reply = generate_response(
+            **response_kwargs(session, user_text, emotion, distress)
+        )
+        generated = time.perf_counter()
+        finish_turn(session, reply)
+
+    stage_seconds.observe("response", generated - admitted)
+    stage_seconds.observe("chat", time.perf_counter() - started)
+
+    resp = jsonify({
+        "response": reply,
+        "emotion": emotion,
+        "distress_level": distress
+    })
+    resp.headers["Server-Timing"] = server_timing(
+        emotion=classified - started,
+        queue=admitted - classified,
+        response=generated - admitted
+    )
+    return resp
+
+@app.route("/chat/stream", methods=["POST"])
+def chat_stream():
+    """
+    Same contract as /chat, streamed as JSON lines:
+    {"token": ...} per LLM chunk, then a final
+    {"done": true, "response": ..., "emotion": ..., "distress_level": ...}
+    with "truncated": true if the LLM failed partway through the reply
+    """
+    data = request.json
+    session_id = data.get("session_id", "default")
+    user_text = data.get("message", "").strip()
+
+    if not user_text:
+        return jsonify({"response": "Please say something so I can help."})
+
+    emotion, distress = classify_turn(user_text)
+
+    # The slot is held until the whole stream has been sent
+    admission.acquire(distress_priority(distress))
+    try:
+        session = start_turn(session_id, emotion)
+        kwargs = response_kwargs(session, user_text, emotion, distress)
+    except Exception:
+        admission.release()
+        raise
+
+    def generate():
+        parts, errors = [], []
+        for token in stream_response(on_truncated=errors.append, **kwargs):
+            parts.append(token)
+            yield json.dumps({"token": token}) + "\n"
+
+        reply = "".join(parts).strip()
+        finish_turn(session, reply)
+
+        done = {
+            "done": True,
+            "response": reply,
+            "emotion": emotion,
+            "distress_level": distress
         }
+        if errors:
+            done["truncated"] = True
+        yield json.dumps(done) + "\n"
 
-    session = sessions[session_id]
-    session["turn_count"] += 1
-
-    # ---- Emotion pipeline ----
-    emotion, score = detect_emotion(user_text)
-    distress = get_distress_level(emotion, score)
-
-    if emotion not in ["neutral", None]:
-        session["last_emotion"] = emotion
-        session["emotion_history"].append(emotion)
-        session["emotion_history"] = session["emotion_history"][-5:]
-
-    # ---- Generate response ----
-    reply = generate_response(
-        emotion=emotion,
-        distress_level=distress,
-        turn_count=session["turn_count"],
-        user_text=user_text,
-        last_emotion=session["last_emotion"],
-        emotion_history=session["emotion_history"],
-        last_bot_action=session["last_bot_action"]
+    resp = Response(
+        stream_with_context(generate()),
+        mimetype="application/x-ndjson"
     )
+    resp.call_on_close(admission.release)
+    return resp
 
-    # Update bot intent memory
-    if "try" in reply.lower():
-        session["last_bot_action"] = "offered_coping"
+def batch_items():
+    """
+    (session_id, message) pairs of a /chat/batch body. Raises ValueError
+    naming the first bad item (JSON body) or line (NDJSON body).
+    """
+    if request.is_json:
+        body = request.get_json(silent=True)
+        items = body.get("items") if isinstance(body, dict) else None
+        if not isinstance(items, list):
+            raise ValueError('expected a JSON object {"items": [...]}')
+        where = "item {}"
+        numbered = list(enumerate(items))
     else:
-        session["last_bot_action"] = "general_support"
+        where = "line {}"
+        numbered = []
+        for number, line in enumerate(request.get_data(as_text=True).splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                numbered.append((number, json.loads(line)))
+            except ValueError as e:
+                raise ValueError(f"line {number}: invalid JSON ({e})")
+
+    pairs = []
+    for number, item in numbered:
+        if not isinstance(item, dict):
+            raise ValueError(f"{where.format(number)}: expected a JSON object")
+        message = item.get("message", "")
+        if not isinstance(message, str):
+            raise ValueError(f'{where.format(number)}: "message" must be a string')
+        pairs.append((item.get("session_id", "default"), message))
+    return pairs
+
+@app.route("/chat/batch", methods=["POST"])
+def chat_batch_route():
+    """
+    Many turns in one request: a JSON body {"items": [{"session_id": ...,
+    "message": ...}, ...]} or one such item per line (NDJSON). Results
+    are streamed back as JSON lines in input order, each with its "index".
+    Every turn goes through admission control; a shed turn carries
+    "error": "busy" instead of a response.
+    """
+    try:
+        pairs = batch_items()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def generate():
+        for result in chat_batch(pairs):
+            yield json.dumps(result) + "\n"
 
+    return Response(
+        stream_with_context(generate()),
+        mimetype="application/x-ndjson"
+    )
+
+@app.route("/chat/reset", methods=["POST"])
+def chat_reset():
+    data = request.json or {}
+    reset_session(data.get("session_id", "default"))
+    return jsonify({"status": "cleared"})
+
+@app.route("/health", methods=["GET"])
+def health():
     return jsonify({
-        "response": reply,
-        "emotion": emotion,
-        "distress_level": distress
+        "llm": circuit_state(),
+        "llm_cache": response_cache.stats(),
+        "sessions": session_stats(),
+        "admission": admission.stats()
     })
 
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(render_metrics(), content_type=CONTENT_TYPE)
+
 if __name__ == "__main__":
+    # Load models up front so the first /chat doesn't pay for it
+    for name, seconds in warmup([EMOTION, *response_models()]).items():
+        print(f"Loaded {name} in {seconds:.2f}s")
+
     # CRITICAL: allows other devices to connect
     app.run(host="0.0.0.0", port=5000, debug=False)
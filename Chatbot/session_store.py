@@ -0,0 +1,299 @@
+# session_store.py
+"""
+Bounded storage for per-session conversation state
+
+Sessions are compact ``__slots__`` records. The in-memory store keeps them
+in LRU order, drops the ones idle for longer than SESSION_IDLE_TTL and
+never holds more than SESSION_MAX. SESSION_STORE=sqlite keeps them in the
+chat_sessions table (Database/database.py) so several worker processes
+share conversation state.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+# --------------------
+# Store Config
+# --------------------
+SESSION_STORE = os.environ.get("SESSION_STORE", "memory")
+SESSION_MAX = int(os.environ.get("SESSION_MAX", 10000))
+SESSION_IDLE_TTL = float(os.environ.get("SESSION_IDLE_TTL", 3600))
+# Longer Ollama contexts are dropped (the next turn resends the full prompt)
+SESSION_MAX_CONTEXT = int(os.environ.get("SESSION_MAX_CONTEXT", 8192))
+SESSION_ID_MAX_LEN = 128
+HISTORY_LEN = 5
+
+# --------------------
+# Session Record
+# --------------------
+class Session:
+    """
+    Conversation state for one session_id. Also reads and writes like a
+    dict (``session["turn_count"]``) so response.py can treat it the same
+    as the plain dict the Streamlit app passes in.
+    """
+
+    __slots__ = (
+        "session_id",
+        "turn_count",
+        "last_emotion",
+        "emotion_history",
+        "last_bot_action",
+        "_llm_context",
+        "llm_context_at",
+        "last_seen"
+    )
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.turn_count = 0
+        self.last_emotion = None
+        self.emotion_history = []
+        self.last_bot_action = None
+        self._llm_context = None
+        self.llm_context_at = None
+        self.last_seen = time.time()
+
+    # Ollama context token ids as a packed int32 array (4 bytes per token
+    # instead of a list of Python ints)
+    @property
+    def llm_context(self):
+        return self._llm_context.tolist() if self._llm_context else None
+
+    @llm_context.setter
+    def llm_context(self, context):
+        if not context or len(context) > SESSION_MAX_CONTEXT:
+            self._llm_context = None
+        else:
+            self._llm_context = array("i", context)
+
+    def __getitem__(self, key):
+        if key.startswith("_") or key not in _FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key.startswith("_") or key not in _FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+_FIELDS = {name.lstrip("_") for name in Session.__slots__}
+
+# --------------------
+# In-memory Store
+# --------------------
+class MemorySessionStore:
+    """
+    LRU + idle-TTL bounded sessions for a single process
+    """
+
+    def __init__(self, max_sessions=SESSION_MAX, idle_ttl=SESSION_IDLE_TTL):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def _expire(self, now):
+        # Oldest first: stop at the first session that is still fresh
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_seen < self.idle_ttl:
+                break
+            self._sessions.popitem(last=False)
+            self.expired += 1
+
+    def get(self, session_id):
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = Session(session_id)
+                self._sessions[session_id] = session
+                self.created += 1
+
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.evicted += 1
+            else:
+                self._sessions.move_to_end(session_id)
+
+            session.last_seen = now
+            return session
+
+    def save(self, session):
+        # Records are updated in place
+        pass
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def stats(self):
+        return {
+            "backend": "memory",
+            "size": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "created": self.created,
+            "expired": self.expired,
+            "evicted": self.evicted
+        }
+
+# --------------------
+# SQLite Store (shared between workers)
+# --------------------
+class SqlSessionStore:
+    """
+    Sessions in the chat_sessions table. Each turn loads the row in
+    get() and writes it back in save(); idle and over-cap rows are swept
+    every ``sweep_every`` saves.
+    """
+
+    def __init__(
+        self,
+        engine=None,
+        max_sessions=SESSION_MAX,
+        idle_ttl=SESSION_IDLE_TTL,
+        sweep_every=100
+    ):
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        from Database.models import ChatSession
+
+        if engine is None:
+            from Database.database import engine
+
+        self.engine = engine
+        self.table = ChatSession.__table__
+        self.table.create(bind=engine, checkfirst=True)
+
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.sweep_every = sweep_every
+        self._lock = threading.Lock()
+        self._saves = 0
+
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def get(self, session_id):
+        from sqlalchemy import select
+
+        now = time.time()
+        with self._lock, self.engine.connect() as conn:
+            row = conn.execute(
+                select(self.table).where(self.table.c.session_id == session_id)
+            ).mappings().first()
+
+        session = Session(session_id)
+        if row is None or now - row["last_seen"] >= self.idle_ttl:
+            self.created += 1
+            return session
+
+        session.turn_count = row["turn_count"] or 0
+        session.last_emotion = row["last_emotion"]
+        session.emotion_history = json.loads(row["emotion_history"] or "[]")
+        session.last_bot_action = row["last_bot_action"]
+        if row["llm_context"]:
+            packed = array("i")
+            packed.frombytes(row["llm_context"])
+            session._llm_context = packed
+        session.llm_context_at = row["llm_context_at"]
+        return session
+
+    def save(self, session):
+        from sqlalchemy.exc import IntegrityError
+
+        session.last_seen = time.time()
+        values = {
+            "turn_count": session.turn_count,
+            "last_emotion": session.last_emotion,
+            "emotion_history": json.dumps(session.emotion_history[-HISTORY_LEN:]),
+            "last_bot_action": session.last_bot_action,
+            "llm_context": session._llm_context.tobytes() if session._llm_context else None,
+            "llm_context_at": session.llm_context_at,
+            "last_seen": session.last_seen
+        }
+        where = self.table.c.session_id == session.session_id
+
+        with self._lock:
+            with self.engine.begin() as conn:
+                updated = conn.execute(self.table.update().where(where).values(**values))
+                if updated.rowcount == 0:
+                    try:
+                        with conn.begin_nested():
+                            conn.execute(self.table.insert().values(
+                                session_id=session.session_id, **values
+                            ))
+                    except IntegrityError:
+                        # Another worker inserted it first
+                        conn.execute(self.table.update().where(where).values(**values))
+
+            self._saves += 1
+            if self._saves % self.sweep_every == 0:
+                self._sweep()
+
+    def _sweep(self):
+        from sqlalchemy import select
+
+        c = self.table.c
+        with self.engine.begin() as conn:
+            expired = conn.execute(
+                self.table.delete().where(c.last_seen < time.time() - self.idle_ttl)
+            ).rowcount
+            overflow = (
+                select(c.session_id)
+                .order_by(c.last_seen.desc())
+                .offset(self.max_sessions)
+                .scalar_subquery()
+            )
+            evicted = conn.execute(
+                self.table.delete().where(c.session_id.in_(overflow))
+            ).rowcount
+
+        self.expired += max(expired, 0)
+        self.evicted += max(evicted, 0)
+
+    def delete(self, session_id):
+        with self._lock, self.engine.begin() as conn:
+            conn.execute(self.table.delete().where(self.table.c.session_id == session_id))
+
+    def __len__(self):
+        from sqlalchemy import func, select
+
+        with self._lock, self.engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(self.table)).scalar()
+
+    def stats(self):
+        # Counters are for this process; size is the shared table
+        return {
+            "backend": "sqlite",
+            "size": len(self),
+            "max_sessions": self.max_sessions,
+            "created": self.created,
+            "expired": self.expired,
+            "evicted": self.evicted
+        }
+
+def make_store(kind=SESSION_STORE):
+    if kind == "sqlite":
+        return SqlSessionStore()
+    return MemorySessionStore()
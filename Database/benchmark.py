@@ -0,0 +1,123 @@
+"""
+SQLite benchmark for mental_health_features
+
+Bulk-inserts synthetic rows through bulk_insert_features() and times the
+typical analytics queries, printing each one's query plan so index use is
+visible.
+
+    python -m Database.benchmark --rows 10000000
+    python -m Database.benchmark --rows 1000000 --profile dev --no-indexes
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from Database.database import bulk_insert_features, make_engine
+from Database.models import Base, MentalHealthFeature
+
+EMOTIONS = ["sadness", "fear", "anger", "joy", "neutral", "nervousness", "optimism"]
+RISK_LEVELS = ["LOW"] * 8 + ["MODERATE"] * 3 + ["ELEVATED"]
+
+QUERIES = {
+    "latest_100": (
+        "SELECT * FROM mental_health_features ORDER BY timestamp DESC LIMIT 100"
+    ),
+    "last_7_days_by_emotion": (
+        "SELECT emotion, COUNT(*), AVG(sentiment_score) FROM mental_health_features "
+        "WHERE timestamp >= :since GROUP BY emotion"
+    ),
+    "elevated_last_30_days": (
+        "SELECT COUNT(*) FROM mental_health_features "
+        "WHERE risk_level = 'ELEVATED' AND timestamp >= :since_30"
+    ),
+    "latest_elevated_50": (
+        "SELECT * FROM mental_health_features WHERE risk_level = 'ELEVATED' "
+        "ORDER BY timestamp DESC LIMIT 50"
+    ),
+}
+
+
+def synthetic_rows(count, start, span_seconds, seed=0):
+    rng = random.Random(seed)
+    step = span_seconds / max(1, count)
+    for i in range(count):
+        score = rng.random()
+        yield {
+            "timestamp": start + timedelta(seconds=i * step),
+            "emotion": rng.choice(EMOTIONS),
+            "emotion_score": round(score, 3),
+            "sentiment_score": round(rng.uniform(-1, 1), 3),
+            "message_length": rng.randint(1, 60),
+            "sadness_streak": rng.randint(0, 5),
+            "risk_level": rng.choice(RISK_LEVELS),
+        }
+
+
+def time_query(conn, sql, params, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(text(sql), params).fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), max(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite benchmark for mental_health_features")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--profile", default="production", choices=["production", "dev"])
+    parser.add_argument("--no-indexes", action="store_true", help="drop the analytics indexes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--db", default=None, help="SQLite file (default: a temp file)")
+    parser.add_argument("--keep", action="store_true", help="keep the database file")
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    engine = make_engine(f"sqlite:///{path}", profile=args.profile)
+    Base.metadata.create_all(bind=engine)
+
+    if args.no_indexes:
+        for index in MentalHealthFeature.__table__.indexes:
+            index.drop(bind=engine)
+
+    days = 365
+    start = datetime(2025, 1, 1)
+    end = start + timedelta(days=days)
+
+    print(f"Inserting {args.rows:,} rows into {path} (profile={args.profile})")
+    started = time.perf_counter()
+    inserted = bulk_insert_features(
+        synthetic_rows(args.rows, start, days * 86400),
+        bind=engine,
+        chunk_size=args.chunk_size
+    )
+    elapsed = time.perf_counter() - started
+    print(f"  {inserted:,} rows in {elapsed:.1f}s = {inserted / elapsed:,.0f} rows/s")
+    print(f"  file size {os.path.getsize(path) / 1e6:,.0f} MB\n")
+
+    params = {"since": end - timedelta(days=7), "since_30": end - timedelta(days=30)}
+    with engine.connect() as conn:
+        conn.execute(text("ANALYZE"))
+        print(f"{'query':<26}{'p50 ms':>10}{'max ms':>10}  plan")
+        for name, sql in QUERIES.items():
+            plan = conn.execute(text("EXPLAIN QUERY PLAN " + sql), params).fetchall()
+            p50, worst = time_query(conn, sql, params, args.repeat)
+            detail = "; ".join(row[-1] for row in plan)
+            print(f"{name:<26}{p50:>10.2f}{worst:>10.2f}  {detail}")
+
+    engine.dispose()
+    if not args.keep and not args.db:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 """
 Database initialization script with SQLite support
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 import os
@@ -12,25 +12,102 @@ DATABASE_URL = os.environ.get(
     "sqlite:///./mental_health_chatbot.db"
 )
 
-# SQLite-specific settings
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool
+# "production": WAL journal, tuned pragmas and a connection pool so readers
+# don't wait for the writer. "dev": one shared connection, SQLite defaults.
+SQLITE_PROFILE = os.environ.get("SQLITE_PROFILE", "production")
+SQLITE_POOL_SIZE = int(os.environ.get("SQLITE_POOL_SIZE", 8))
+SQLITE_CACHE_MB = int(os.environ.get("SQLITE_CACHE_MB", 64))
+SQLITE_MMAP_MB = int(os.environ.get("SQLITE_MMAP_MB", 256))
+SQLITE_BUSY_TIMEOUT = float(os.environ.get("SQLITE_BUSY_TIMEOUT", 5))
+
+# Rows per executemany in bulk_insert()
+BULK_CHUNK_SIZE = int(os.environ.get("BULK_CHUNK_SIZE", 10000))
+# Update the daily rollups (Database/rollups.py) in bulk_insert_features()
+MAINTAIN_ROLLUPS = os.environ.get("MAINTAIN_ROLLUPS", "1") == "1"
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    # Durable at checkpoints; safe from corruption in WAL mode
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_MB * 1024}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_MB * 1024 * 1024}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute(f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT * 1000)}")
+    cursor.close()
+
+def make_engine(url=DATABASE_URL, profile=SQLITE_PROFILE):
+    if not url.startswith("sqlite"):
+        # PostgreSQL or other databases
+        return create_engine(url, pool_pre_ping=True)
+
+    in_memory = url in ("sqlite://", "sqlite:///:memory:")
+    if profile != "production" or in_memory:
+        # SQLite-specific settings
+        return create_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool
+        )
+
+    sqlite_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT},
+        pool_size=SQLITE_POOL_SIZE,
+        max_overflow=SQLITE_POOL_SIZE
     )
-else:
-    # PostgreSQL or other databases
-    engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+    event.listen(sqlite_engine, "connect", _sqlite_pragmas)
+    return sqlite_engine
+
+engine = make_engine()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def init_db():
+def init_db(bind=None):
     """
     Initialize database - create all tables
     """
-    from db.models import Base
-    Base.metadata.create_all(bind=engine)
+    from Database.models import Base
+    bind = bind or engine
+    Base.metadata.create_all(bind=bind)
+
+    # create_all() skips existing tables, so add indexes introduced later
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
+def bulk_insert(table, rows, bind=None, chunk_size=BULK_CHUNK_SIZE, on_chunk=None):
+    """
+    Insert an iterable of dicts with Core executemany, ``chunk_size`` rows
+    per statement, all in one transaction. ``on_chunk(conn, chunk)`` runs
+    after each statement in the same transaction. Returns the row count.
+    """
+    count = 0
+    chunk = []
+    with (bind or engine).begin() as conn:
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                conn.execute(table.insert(), chunk)
+                if on_chunk:
+                    on_chunk(conn, chunk)
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            conn.execute(table.insert(), chunk)
+            if on_chunk:
+                on_chunk(conn, chunk)
+            count += len(chunk)
+    return count
+
+def bulk_insert_features(rows, bind=None, chunk_size=BULK_CHUNK_SIZE):
+    from Database.models import MentalHealthFeature
+    from Database.rollups import apply_rollups
+
+    return bulk_insert(
+        MentalHealthFeature.__table__, rows, bind, chunk_size,
+        on_chunk=apply_rollups if MAINTAIN_ROLLUPS else None
+    )
 
 def get_db():
     """
@@ -0,0 +1,210 @@
+"""
+Write-behind persistence for MentalHealthFeature rows
+
+Callers hand rows to a bounded queue and return immediately; a background
+thread inserts them in bulk once FEATURE_BATCH_SIZE rows are waiting or
+FEATURE_FLUSH_INTERVAL seconds after the first one arrived. If the
+database falls behind and the queue fills up, submit() blocks for up to
+FEATURE_PUT_TIMEOUT seconds and then drops the row (counted in stats()).
+Pending rows are flushed at interpreter exit.
+"""
+import atexit
+import os
+import queue
+import threading
+import time
+import warnings
+from datetime import datetime, timezone
+
+# PERSIST_FEATURES=0 turns persistence off (persist_features() is a no-op)
+PERSIST_FEATURES = os.environ.get("PERSIST_FEATURES", "1") == "1"
+FEATURE_BATCH_SIZE = int(os.environ.get("FEATURE_BATCH_SIZE", 500))
+FEATURE_FLUSH_INTERVAL = float(os.environ.get("FEATURE_FLUSH_INTERVAL", 1.0))
+FEATURE_QUEUE_SIZE = int(os.environ.get("FEATURE_QUEUE_SIZE", 10000))
+FEATURE_PUT_TIMEOUT = float(os.environ.get("FEATURE_PUT_TIMEOUT", 0.05))
+FEATURE_MAX_RETRIES = int(os.environ.get("FEATURE_MAX_RETRIES", 5))
+
+COLUMNS = (
+    "timestamp", "emotion", "emotion_score", "sentiment_score",
+    "message_length", "sadness_streak", "risk_level"
+)
+# Column defaults for keys a features dict leaves out. Every row carries
+# every column: executemany binds the keys of the first row of a batch.
+DEFAULTS = {"emotion_score": 0.0, "message_length": 0, "sadness_streak": 0, "risk_level": "LOW"}
+
+_STOP = object()
+
+
+def feature_row(features):
+    """
+    Insert parameters for one features dict (as returned by analyze_text):
+    all COLUMNS, with the timestamp as naive UTC like the rest of the table
+    """
+    row = {name: features.get(name, DEFAULTS.get(name)) for name in COLUMNS}
+    timestamp = row["timestamp"]
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    if timestamp is None:
+        timestamp = datetime.utcnow()
+    elif timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    row["timestamp"] = timestamp
+    return row
+
+
+class FeatureWriter:
+    def __init__(
+        self,
+        engine=None,
+        batch_size=FEATURE_BATCH_SIZE,
+        flush_interval=FEATURE_FLUSH_INTERVAL,
+        max_queue=FEATURE_QUEUE_SIZE,
+        put_timeout=FEATURE_PUT_TIMEOUT,
+        max_retries=FEATURE_MAX_RETRIES
+    ):
+        self.engine = engine
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.put_timeout = put_timeout
+        self.max_retries = max_retries
+
+        self._lock = threading.Lock()
+        self._queue = None
+        self._worker = None
+        self._pid = None
+        self._ready = False
+        self._closing = False
+
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+
+    def submit(self, features):
+        """
+        Queue one row; False if it was dropped because the queue stayed full
+        """
+        if self._closing:
+            self.dropped += 1
+            return False
+        try:
+            self._ensure_worker().put(feature_row(features), timeout=self.put_timeout)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _ensure_worker(self):
+        # Threads do not survive fork(), so each process gets its own worker
+        pid = os.getpid()
+        if self._pid == pid and self._worker.is_alive():
+            return self._queue
+
+        with self._lock:
+            if self._pid != pid:
+                self._queue = queue.Queue(maxsize=self.max_queue)
+            if self._pid != pid or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run,
+                    args=(self._queue,),
+                    name="feature-writer",
+                    daemon=True
+                )
+                self._worker.start()
+                self._pid = pid
+        return self._queue
+
+    def _run(self, pending):
+        batch = []
+        deadline = None
+
+        while True:
+            timeout = None if not batch else max(0.0, deadline - time.monotonic())
+            try:
+                item = pending.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                if batch:
+                    self._write(batch)
+                return
+
+            if item is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(item)
+                if len(batch) < self.batch_size:
+                    continue
+
+            self._write(batch)
+            batch = []
+
+    def _insert(self, rows):
+        from Database.database import bulk_insert_features, engine, init_db
+
+        if self.engine is None:
+            self.engine = engine
+
+        if not self._ready:
+            init_db(self.engine)
+            self._ready = True
+
+        bulk_insert_features(rows, bind=self.engine)
+
+    def _write(self, rows):
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                self._insert(rows)
+                self.written += len(rows)
+                self.batches += 1
+                return
+            except Exception as e:
+                self.failed_flushes += 1
+                warnings.warn(
+                    f"Feature write failed ({attempt}/{self.max_retries}): {e}",
+                    RuntimeWarning
+                )
+                if self._closing:
+                    break
+                # Rows keep queueing meanwhile; a full queue pushes back on submit()
+                time.sleep(min(30.0, 0.5 * 2 ** attempt))
+
+        self.dropped += len(rows)
+
+    def close(self, timeout=10.0):
+        """
+        Flush everything queued so far and stop the worker
+        """
+        if self._pid != os.getpid() or self._worker is None or not self._worker.is_alive():
+            return
+        # New rows are refused and a failing flush is not retried from here on
+        self._closing = True
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._worker.join(timeout)
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failed_flushes": self.failed_flushes
+        }
+
+
+feature_writer = FeatureWriter()
+atexit.register(feature_writer.close)
+
+
+def persist_features(features):
+    """
+    Queue a features dict for the mental_health_features table
+    """
+    if not PERSIST_FEATURES:
+        return False
+    return feature_writer.submit(features)
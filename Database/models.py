@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, String, DateTime
+from sqlalchemy import Column, Integer, Float, String, Date, DateTime, Index, LargeBinary, Text
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -7,7 +7,8 @@ Base = declarative_base()
 class MentalHealthFeature(Base):
     __tablename__ = "mental_health_features"
 
-    id = Column(Integer, primary_key=True, index=True)
+    # The primary key is SQLite's rowid: a separate index would only slow inserts
+    id = Column(Integer, primary_key=True)
     timestamp = Column(DateTime(timezone=True), default=datetime.utcnow)
     emotion = Column(String, nullable=False)
     emotion_score = Column(Float, default=0.0)
@@ -16,5 +17,63 @@ class MentalHealthFeature(Base):
     sadness_streak = Column(Integer, default=0)
     risk_level = Column(String, default="LOW")
 
+    # Analytics filter and sort on time, often within one risk level
+    __table_args__ = (
+        Index("ix_mental_health_features_timestamp", "timestamp"),
+        Index("ix_mental_health_features_risk_level_timestamp", "risk_level", "timestamp"),
+    )
+
     def __repr__(self):
         return f"<MentalHealthFeature(id={self.id}, emotion={self.emotion}, risk_level={self.risk_level})>"
+
+
+class ChatSession(Base):
+    """
+    Conversation state shared by every chatbot worker (SESSION_STORE=sqlite)
+    """
+    __tablename__ = "chat_sessions"
+
+    session_id = Column(String, primary_key=True)
+    turn_count = Column(Integer, default=0)
+    last_emotion = Column(String, nullable=True)
+    emotion_history = Column(Text, default="[]")
+    last_bot_action = Column(String, nullable=True)
+    llm_context = Column(LargeBinary, nullable=True)
+    llm_context_at = Column(Float, nullable=True)
+    last_seen = Column(Float, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<ChatSession(session_id={self.session_id}, turn_count={self.turn_count})>"
+
+
+class FeatureDailyRollup(Base):
+    """
+    Per-day totals over mental_health_features, kept up to date on insert
+    (Database/rollups.py)
+    """
+    __tablename__ = "feature_daily_rollups"
+
+    day = Column(Date, primary_key=True)
+    row_count = Column(Integer, nullable=False, default=0)
+    sentiment_sum = Column(Float, nullable=False, default=0.0)
+    sentiment_count = Column(Integer, nullable=False, default=0)
+    sadness_streak_sum = Column(Integer, nullable=False, default=0)
+    max_sadness_streak = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<FeatureDailyRollup(day={self.day}, row_count={self.row_count})>"
+
+
+class FeatureDailyCount(Base):
+    """
+    Per-day row counts by emotion and by risk level
+    """
+    __tablename__ = "feature_daily_counts"
+
+    day = Column(Date, primary_key=True)
+    dimension = Column(String, primary_key=True)  # "emotion" or "risk_level"
+    value = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<FeatureDailyCount(day={self.day}, {self.dimension}={self.value}, count={self.count})>"
@@ -0,0 +1,150 @@
+"""
+Daily rollups of mental_health_features
+
+bulk_insert_features() folds every inserted chunk into per-day totals
+(feature_daily_rollups) and per-day counts by emotion and risk level
+(feature_daily_counts) in the same transaction, so dashboards read a few
+rows per day instead of the raw history. rebuild_rollups() recomputes
+them from scratch, e.g. for rows written some other way.
+"""
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select
+
+from Database.models import FeatureDailyCount, FeatureDailyRollup, MentalHealthFeature
+
+DIMENSIONS = ("emotion", "risk_level")
+
+# Column defaults the insert applies when a key is missing
+DEFAULTS = {"risk_level": "LOW", "sadness_streak": 0}
+
+
+def _day(timestamp, utc=True):
+    # Days are UTC, like the stored timestamps. SQLite keeps the wall-clock
+    # time of an aware value and drops the offset (utc=False there), so it
+    # is counted under the day it will read back as.
+    if utc and timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc)
+    return timestamp.date()
+
+
+def aggregate(rows, utc=True):
+    """
+    Per-day totals and per-(day, dimension, value) counts for ``rows``,
+    counted as they are stored: a missing key takes the column default,
+    an explicit None stays NULL and is not counted (as in rebuild_rollups())
+    """
+    daily = {}
+    counts = {}
+    for row in rows:
+        if "timestamp" not in row:
+            timestamp = datetime.utcnow()  # column default
+        elif row["timestamp"] is None:
+            continue  # no day to count it under
+        else:
+            timestamp = row["timestamp"]
+        day = _day(timestamp, utc)
+        streak = row.get("sadness_streak", DEFAULTS["sadness_streak"]) or 0
+
+        totals = daily.get(day)
+        if totals is None:
+            totals = daily[day] = [0, 0.0, 0, 0, 0]
+        totals[0] += 1
+        if row.get("sentiment_score") is not None:
+            totals[1] += row["sentiment_score"]
+            totals[2] += 1
+        totals[3] += streak
+        totals[4] = max(totals[4], streak)
+
+        for dimension in DIMENSIONS:
+            value = row.get(dimension, DEFAULTS.get(dimension))
+            if value is not None:
+                key = (day, dimension, value)
+                counts[key] = counts.get(key, 0) + 1
+
+    return daily, counts
+
+
+def _insert(conn):
+    if conn.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def _greatest(conn, a, b):
+    return func.greatest(a, b) if conn.dialect.name == "postgresql" else func.max(a, b)
+
+
+def apply_rollups(conn, rows):
+    """
+    Add ``rows`` (dicts as passed to the insert) to the rollups, inside the
+    caller's transaction
+    """
+    daily, counts = aggregate(rows, utc=conn.dialect.name != "sqlite")
+    if not daily:
+        return
+
+    insert = _insert(conn)
+
+    table = FeatureDailyRollup.__table__
+    stmt = insert(table)
+    conn.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["day"],
+            set_={
+                "row_count": table.c.row_count + stmt.excluded.row_count,
+                "sentiment_sum": table.c.sentiment_sum + stmt.excluded.sentiment_sum,
+                "sentiment_count": table.c.sentiment_count + stmt.excluded.sentiment_count,
+                "sadness_streak_sum": table.c.sadness_streak_sum + stmt.excluded.sadness_streak_sum,
+                "max_sadness_streak": _greatest(
+                    conn, table.c.max_sadness_streak, stmt.excluded.max_sadness_streak
+                ),
+            }
+        ),
+        [
+            {
+                "day": day,
+                "row_count": n,
+                "sentiment_sum": s_sum,
+                "sentiment_count": s_count,
+                "sadness_streak_sum": streak_sum,
+                "max_sadness_streak": streak_max,
+            }
+            for day, (n, s_sum, s_count, streak_sum, streak_max) in daily.items()
+        ]
+    )
+
+    table = FeatureDailyCount.__table__
+    stmt = insert(table)
+    conn.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["day", "dimension", "value"],
+            set_={"count": table.c.count + stmt.excluded.count}
+        ),
+        [
+            {"day": day, "dimension": dimension, "value": value, "count": n}
+            for (day, dimension, value), n in counts.items()
+        ]
+    )
+
+
+def rebuild_rollups(bind=None, chunk_size=50000):
+    """
+    Recompute all rollups from mental_health_features (one streaming scan)
+    """
+    if bind is None:
+        from Database.database import engine as bind
+
+    features = MentalHealthFeature.__table__
+    columns = [features.c[name] for name in
+               ("timestamp", "sentiment_score", "sadness_streak") + DIMENSIONS]
+
+    with bind.begin() as conn:
+        conn.execute(FeatureDailyRollup.__table__.delete())
+        conn.execute(FeatureDailyCount.__table__.delete())
+
+        result = conn.execution_options(yield_per=chunk_size).execute(select(*columns))
+        for part in result.partitions(chunk_size):
+            apply_rollups(conn, [dict(row._mapping) for row in part])
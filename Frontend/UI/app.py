@@ -1,8 +1,14 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify
 from datetime import datetime
-from transformers import pipeline
 from nltk.sentiment import SentimentIntensityAnalyzer
+import os
 import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "ml"))
+from model_registry import get_model, register_pipeline
+from metrics import CONTENT_TYPE, Gauge, fallbacks, render as render_metrics, stage_seconds
 
 from database import init_db, get_mood_history, save_mood as db_save_mood
 
@@ -23,10 +29,12 @@ def detect_emotion(text):
     else:
         return "neutral", round(score, 2)
 
-# Chatbot Model (LOCAL)
-chatbot = pipeline(
+# Chatbot Model (LOCAL, loaded on first use)
+register_pipeline(
+    "chatbot",
     "text-generation",
     model="distilgpt2",
+    warmup_kwargs={"max_new_tokens": 1},
     max_new_tokens=180,
     temperature=0.85,
     top_p=0.95
@@ -35,6 +43,8 @@ chatbot = pipeline(
 # Memory
 chat_logs = []
 
+Gauge("ui_chat_log_entries", "Messages held in the in-memory chat log", lambda: len(chat_logs))
+
 # Chatbot Response Logic
 def generate_llm_response(user_text, emotion):
     prompt = (
@@ -46,28 +56,31 @@ def generate_llm_response(user_text, emotion):
     )
 
     try:
-        result = chatbot(prompt)[0]["generated_text"]
+        chatbot = get_model("chatbot")
+        with stage_seconds.time("llm"):
+            result = chatbot(prompt)[0]["generated_text"]
         reply = result.split("Assistant:")[-1].strip()
 
-        if len(reply) < 15:
-            raise Exception("Too short")
-
-        return reply
+        if len(reply) >= 15:
+            return reply
+        fallbacks.inc("llm_short_reply")
 
     except Exception:
-        fallback = {
-            "negative": (
-                "That sounds really difficult, and it makes sense that it would feel heavy. "
-                "You don’t have to explain everything perfectly — I’m listening."
-            ),
-            "positive": (
-                "It’s nice to hear that. Moments like that can be meaningful, even if they feel small."
-            ),
-            "neutral": (
-                "I’m here with you. Take your time — whatever you want to share is okay."
-            )
-        }
-        return fallback.get(emotion, fallback["neutral"])
+        fallbacks.inc("llm_error")
+
+    fallback = {
+        "negative": (
+            "That sounds really difficult, and it makes sense that it would feel heavy. "
+            "You don’t have to explain everything perfectly — I’m listening."
+        ),
+        "positive": (
+            "It’s nice to hear that. Moments like that can be meaningful, even if they feel small."
+        ),
+        "neutral": (
+            "I’m here with you. Take your time — whatever you want to share is okay."
+        )
+    }
+    return fallback.get(emotion, fallback["neutral"])
 
 # Routes
 @app.route("/")
@@ -99,7 +112,9 @@ def ai_chat():
             )
         })
 
-    emotion, confidence = detect_emotion(message)
+    started = time.perf_counter()
+    with stage_seconds.time("emotion"):
+        emotion, confidence = detect_emotion(message)
     reply = generate_llm_response(message, emotion)
 
     # Memory illusion
@@ -113,6 +128,7 @@ def ai_chat():
         "time": datetime.now().strftime("%Y-%m-%d %H:%M")
     })
 
+    stage_seconds.observe("chat", time.perf_counter() - started)
     return jsonify({
         "emotion": emotion,
         "confidence": confidence,
@@ -127,6 +143,10 @@ def mood_data():
         for mood, time in history[::-1]
     ])
 
+@app.route("/metrics")
+def metrics():
+    return Response(render_metrics(), content_type=CONTENT_TYPE)
+
 @app.route("/stats_view")
 def stats_view():
     return render_template("stats.html")
@@ -1,5 +1,13 @@
 # from analytics.load_data import load_features_df
+import os
+import sys
+
 import pandas as pd
+from sqlalchemy import func, select
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Database.database import engine
+from Database.models import FeatureDailyCount, FeatureDailyRollup
 
 def basic_insights(df):
     return {
@@ -23,6 +31,75 @@ def recent_trend(df, window=7):
         "avg_sadness_streak_last_7_days": round(recent["sadness_streak"].mean(), 2)
     }
 
+# --------------------------------------------------
+# Same insights from the daily rollups (Database/rollups.py): a few rows per
+# day instead of a scan of mental_health_features. "Days" in recent_trend
+# are calendar days with data rather than the last ``window`` rows.
+# --------------------------------------------------
+def _rollup_tables(bind):
+    return bind or engine, FeatureDailyRollup.__table__, FeatureDailyCount.__table__
+
+def _ratio(total, count, digits):
+    return round(total / count, digits) if count else None
+
+def _top_value(conn, counts, dimension, days=None):
+    # Highest count, ties broken alphabetically like Series.mode()[0]
+    total = func.sum(counts.c.count)
+    query = select(counts.c.value).where(counts.c.dimension == dimension)
+    if days is not None:
+        query = query.where(counts.c.day.in_(days))
+    query = query.group_by(counts.c.value).order_by(total.desc(), counts.c.value).limit(1)
+    return conn.execute(query).scalar()
+
+def basic_insights_rollup(bind=None):
+    bind, daily, counts = _rollup_tables(bind)
+    with bind.connect() as conn:
+        rows, s_sum, s_count, streak = conn.execute(select(
+            func.coalesce(func.sum(daily.c.row_count), 0),
+            func.sum(daily.c.sentiment_sum),
+            func.sum(daily.c.sentiment_count),
+            func.max(daily.c.max_sadness_streak)
+        )).one()
+        return {
+            "total_days": int(rows),
+            "avg_sentiment": _ratio(s_sum, s_count, 3),
+            "most_common_emotion": _top_value(conn, counts, "emotion"),
+            "max_sadness_streak": int(streak) if streak is not None else None
+        }
+
+def risk_insights_rollup(bind=None):
+    bind, daily, counts = _rollup_tables(bind)
+    total = func.sum(counts.c.count)
+    with bind.connect() as conn:
+        distribution = dict(conn.execute(
+            select(counts.c.value, total)
+            .where(counts.c.dimension == "risk_level")
+            .group_by(counts.c.value)
+            .order_by(total.desc(), counts.c.value)
+        ).all())
+    return {
+        "risk_distribution": {level: int(n) for level, n in distribution.items()},
+        "elevated_days": int(distribution.get("ELEVATED", 0))
+    }
+
+def recent_trend_rollup(window=7, bind=None):
+    bind, daily, counts = _rollup_tables(bind)
+    days = select(daily.c.day).order_by(daily.c.day.desc()).limit(window).scalar_subquery()
+    with bind.connect() as conn:
+        rows, s_sum, s_count, streak_sum = conn.execute(
+            select(
+                func.sum(daily.c.row_count),
+                func.sum(daily.c.sentiment_sum),
+                func.sum(daily.c.sentiment_count),
+                func.sum(daily.c.sadness_streak_sum)
+            ).where(daily.c.day.in_(days))
+        ).one()
+        return {
+            "avg_recent_sentiment": _ratio(s_sum, s_count, 3),
+            "dominant_emotion_last_7_days": _top_value(conn, counts, "emotion", days),
+            "avg_sadness_streak_last_7_days": _ratio(streak_sum, rows, 2)
+        }
+
 if __name__ == "__main__":
     df = pd.read_csv(r"mental_health_features.csv")  # Replace with load_features_df() in real use
 
@@ -1,24 +1,122 @@
+import os
+import sys
+from datetime import datetime, timezone
+
 import pandas as pd
-from db.database import SessionLocal
-from db.models import MentalHealthFeature
+from sqlalchemy import select
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Database.database import engine
+from Database.models import MentalHealthFeature
+
+# Rows fetched (and converted) per round trip
+LOAD_CHUNK_SIZE = int(os.environ.get("LOAD_CHUNK_SIZE", 50000))
+
+FEATURE_COLUMNS = (
+    "timestamp", "emotion", "sentiment_score",
+    "message_length", "sadness_streak", "risk_level"
+)
+
+NUMERIC_DTYPES = {
+    "id": "Int64",
+    "emotion_score": "float64",
+    "sentiment_score": "float64",
+    "message_length": "Int32",
+    "sadness_streak": "Int32",
+}
+CATEGORICAL = ("emotion", "risk_level")
+
+
+def _utc_naive(value):
+    # Timestamps are stored as naive UTC
+    if value is None:
+        return None
+    value = pd.Timestamp(value).to_pydatetime()
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _as_list(value):
+    if value is None:
+        return None
+    return [value] if isinstance(value, str) else list(value)
+
+
+def build_query(start=None, end=None, emotions=None, risk_levels=None,
+                columns=FEATURE_COLUMNS, descending=False, limit=None):
+    """
+    SELECT with the filters and ORDER BY timestamp done by the database.
+    ``start`` is inclusive, ``end`` exclusive.
+    """
+    table = MentalHealthFeature.__table__
+    query = select(*(table.c[name] for name in columns))
+
+    if start is not None:
+        query = query.where(table.c.timestamp >= _utc_naive(start))
+    if end is not None:
+        query = query.where(table.c.timestamp < _utc_naive(end))
+    if emotions is not None:
+        query = query.where(table.c.emotion.in_(_as_list(emotions)))
+    if risk_levels is not None:
+        query = query.where(table.c.risk_level.in_(_as_list(risk_levels)))
+
+    order = table.c.timestamp.desc() if descending else table.c.timestamp
+    query = query.order_by(order, table.c.id.desc() if descending else table.c.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def _frame(rows, columns):
+    # Column-wise straight into typed arrays (no per-row dicts)
+    values = list(zip(*rows)) if rows else [()] * len(columns)
+    data = {}
+    for name, column in zip(columns, values):
+        if name == "timestamp":
+            data[name] = pd.to_datetime(pd.Series(column, dtype="object"))
+        elif name in CATEGORICAL:
+            data[name] = pd.Categorical(column)
+        else:
+            data[name] = pd.array(column, dtype=NUMERIC_DTYPES.get(name, "object"))
+    return pd.DataFrame(data, columns=list(columns))
+
 
-def load_features_df():
-    session = SessionLocal()
+def iter_features(start=None, end=None, emotions=None, risk_levels=None,
+                  columns=FEATURE_COLUMNS, chunksize=LOAD_CHUNK_SIZE,
+                  descending=False, limit=None, bind=None):
+    """
+    Yield the matching rows as DataFrames of at most ``chunksize`` rows,
+    in timestamp order, without holding the whole result in memory
+    """
+    columns = tuple(columns)
+    query = build_query(start, end, emotions, risk_levels, columns, descending, limit)
 
-    rows = session.query(MentalHealthFeature).all()
+    with (bind or engine).connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunksize).execute(query)
+        for rows in result.partitions(chunksize):
+            yield _frame(rows, columns)
 
-    data = [{
-        "timestamp": r.timestamp,
-        "emotion": r.emotion,
-        "sentiment_score": r.sentiment_score,
-        "message_length": r.message_length,
-        "sadness_streak": r.sadness_streak,
-        "risk_level": r.risk_level
-    } for r in rows]
 
-    session.close()
+def load_features_df(start=None, end=None, emotions=None, risk_levels=None,
+                     columns=FEATURE_COLUMNS, chunksize=None,
+                     descending=False, limit=None, bind=None):
+    """
+    Feature rows as one DataFrame sorted by timestamp, or an iterator of
+    DataFrames when ``chunksize`` is given (out-of-core processing)
+    """
+    if chunksize is not None:
+        return iter_features(start, end, emotions, risk_levels, columns,
+                             chunksize, descending, limit, bind)
 
-    df = pd.DataFrame(data)
-    df = df.sort_values("timestamp")
+    chunks = list(iter_features(start, end, emotions, risk_levels, columns,
+                                LOAD_CHUNK_SIZE, descending, limit, bind))
+    if not chunks:
+        return _frame([], tuple(columns))
 
+    df = pd.concat(chunks, ignore_index=True)
+    # Chunks carry their own categories; unify them
+    for name in CATEGORICAL:
+        if name in df.columns:
+            df[name] = df[name].astype("category")
     return df
@@ -1,37 +1,26 @@
-from transformers import pipeline
+import os
+import sys
+
 import numpy as np
 from datetime import datetime, timezone
 
+from inference_service import analyze, classify_risk
 
-emotion_pipe = pipeline(
-    task="text-classification",
-    model="minuva/MiniLMv2-goemotions-v2",
-    top_k=None
-)
-
-sentiment_pipe = pipeline(
-    task="sentiment-analysis",
-    model="distilbert-base-uncased-finetuned-sst-2-english"
-)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Database.feature_writer import persist_features
 
 
-def analyze_text(text: str):
+def analyze_text(text: str, sadness_streak: int = 0):
     """
-    Takes user text and returns ML-derived features
+    Takes user text and returns ML-derived features. ``sadness_streak`` comes
+    from the caller's mood history (the chatbot's MoodTracker), if it has one.
     """
 
-    # Emotion
-    emotions = emotion_pipe(text)[0]
-    top_emotion = max(emotions, key=lambda x: x["score"])
-
-    # Sentiment
-    sentiment = sentiment_pipe(text)[0]
-    sentiment_score = sentiment["score"]
-    if sentiment["label"] == "NEGATIVE":
-        sentiment_score *= -1
-
-    # Simple risk heuristic (SAFE)
-    risk_level = classify_risk(sentiment_score, top_emotion["label"])
+    # Emotion, sentiment and risk from the shared inference service
+    result = analyze(text)
+    top_emotion = result["top_emotion"]
+    sentiment_score = result["sentiment_score"]
+    risk_level = result["risk_level"]
 
     # Features for DB (NO RAW TEXT STORED)
     features = {
@@ -40,23 +29,13 @@ def analyze_text(text: str):
         "emotion_score": round(top_emotion["score"], 3),
         "sentiment_score": round(sentiment_score, 3),
         "message_length": len(text.split()),
+        "sadness_streak": sadness_streak,
         "risk_level": risk_level
     }
 
+    # Written to the database in the background, in batches
+    persist_features(features)
+
     return features 
 # {'timestamp': '2025-12-18T22:50:01.150073+00:00', 'emotion': 'sadness', 'emotion_score': 0.941, 'sentiment_score': -0.998, 'message_length': 7, 'risk_level': 'ELEVATED'}
 
-
-#RISK CLASSIFICATION (NOT PREDICTION)
-def classify_risk(sentiment_score, emotion):
-    """
-    Returns LOW / MODERATE / ELEVATED
-    """
-
-    if sentiment_score < -0.6 and emotion in ["sadness", "fear", "anger"]:
-        return "ELEVATED"
-
-    if sentiment_score < -0.3:
-        return "MODERATE"
-
-    return "LOW"
@@ -0,0 +1,247 @@
+"""
+Shared inference service for emotion + sentiment
+
+Owns the classifier models for the whole process so the chatbot and the
+feature pipeline don't each load their own copy. Every message is
+tokenized once per model and classified in a single batched forward pass.
+"""
+import os
+
+import stub_backend
+from metrics import Counter
+from model_registry import INFERENCE_BACKEND, get_model, register_pipeline
+from result_cache import text_cache
+
+EMOTION_MODEL_ID = os.environ.get("EMOTION_MODEL", "SamLowe/roberta-base-go_emotions")
+SENTIMENT_MODEL_ID = os.environ.get(
+    "SENTIMENT_MODEL", "distilbert-base-uncased-finetuned-sst-2-english"
+)
+
+# "model" runs the SST-2 classifier, "emotions" derives sentiment from the
+# GoEmotions distribution so each message goes through one model only
+SENTIMENT_SOURCE = os.environ.get("SENTIMENT_SOURCE", "model")
+
+# Long messages are split into overlapping token windows ("chunk") rather
+# than cut at the model's max length ("truncate")
+LONG_TEXT_MODE = os.environ.get("LONG_TEXT_MODE", "chunk")
+CHUNK_MAX_TOKENS = int(os.environ.get("CHUNK_MAX_TOKENS", 512))
+CHUNK_STRIDE = int(os.environ.get("CHUNK_STRIDE", 64))
+CHUNK_MAX_WINDOWS = int(os.environ.get("CHUNK_MAX_WINDOWS", 8))
+CHUNK_AGGREGATE = os.environ.get("CHUNK_AGGREGATE", "max")
+
+# Sentence embeddings for similarity lookups
+EMBEDDING_MODEL_ID = os.environ.get(
+    "EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"
+)
+
+EMOTION = "emotion"
+SENTIMENT = "sentiment"
+EMBEDDING = "embedding"
+
+register_pipeline(EMOTION, "text-classification", model=EMOTION_MODEL_ID, top_k=None)
+register_pipeline(SENTIMENT, "sentiment-analysis", model=SENTIMENT_MODEL_ID, top_k=None)
+register_pipeline(EMBEDDING, "feature-extraction", model=EMBEDDING_MODEL_ID)
+
+POSITIVE_EMOTIONS = {
+    "admiration", "amusement", "approval", "caring", "excitement",
+    "gratitude", "joy", "love", "optimism", "pride", "relief"
+}
+NEGATIVE_EMOTIONS = {
+    "anger", "annoyance", "disappointment", "disapproval", "disgust",
+    "embarrassment", "fear", "grief", "nervousness", "remorse", "sadness"
+}
+
+truncated_texts = Counter(
+    "inference_truncated_texts_total",
+    "Texts classified without some of their tokens (past CHUNK_MAX_WINDOWS, or LONG_TEXT_MODE=truncate)",
+    label="mode"
+)
+
+
+def _windows(ids, size):
+    """
+    Overlapping windows of at most ``size`` token ids covering ``ids``.
+    Texts that don't fit are counted in ``inference_truncated_texts_total``.
+    """
+    if len(ids) <= size:
+        return [ids]
+    if LONG_TEXT_MODE == "truncate":
+        truncated_texts.inc("truncate")
+        return [ids[:size]]
+
+    step = max(1, size - CHUNK_STRIDE)
+    starts = list(range(0, len(ids) - size, step)) + [len(ids) - size]
+
+    # Bound worst-case cost: keep the opening windows and the final one,
+    # dropping the middle of the text
+    if len(starts) > CHUNK_MAX_WINDOWS:
+        truncated_texts.inc("chunk")
+        starts = starts[:CHUNK_MAX_WINDOWS - 1] + starts[-1:]
+
+    return [ids[start:start + size] for start in starts]
+
+
+def _aggregate(rows):
+    if len(rows) == 1:
+        return rows[0]
+    if CHUNK_AGGREGATE == "mean":
+        return [sum(col) / len(rows) for col in zip(*rows)]
+    return [max(col) for col in zip(*rows)]
+
+
+def _classify(name, texts):
+    """
+    Tokenize ``texts`` once, classify every window in one forward pass and
+    return ``(distributions, token_counts)``. Distributions are sorted,
+    highest score first.
+    """
+    if INFERENCE_BACKEND == "stub":
+        return stub_backend.classify(name, texts)
+
+    import torch
+
+    pipe = get_model(name)
+    tokenizer = pipe.tokenizer
+    config = pipe.model.config
+
+    size = min(CHUNK_MAX_TOKENS, tokenizer.model_max_length)
+    size -= tokenizer.num_special_tokens_to_add()
+
+    token_ids = tokenizer(list(texts), add_special_tokens=False)["input_ids"]
+
+    windows, owners = [], []
+    for i, ids in enumerate(token_ids):
+        for window in _windows(ids, size):
+            windows.append(tokenizer.build_inputs_with_special_tokens(window))
+            owners.append(i)
+
+    encoded = tokenizer.pad({"input_ids": windows}, return_tensors="pt")
+    with torch.inference_mode():
+        logits = pipe.model(**encoded).logits
+
+    if config.problem_type == "multi_label_classification" or config.num_labels == 1:
+        probs = torch.sigmoid(logits)
+    else:
+        probs = torch.softmax(logits, dim=-1)
+
+    per_text = [[] for _ in token_ids]
+    for owner, row in zip(owners, probs.tolist()):
+        per_text[owner].append(row)
+
+    distributions = [
+        sorted(
+            ({"label": config.id2label[i], "score": score} for i, score in enumerate(_aggregate(rows))),
+            key=lambda x: x["score"],
+            reverse=True
+        )
+        for rows in per_text
+    ]
+    return distributions, [len(ids) for ids in token_ids]
+
+
+def _sentiment_scores(texts, emotions):
+    if SENTIMENT_SOURCE == "emotions":
+        scores = []
+        for dist in emotions:
+            pos = sum(e["score"] for e in dist if e["label"] in POSITIVE_EMOTIONS)
+            neg = sum(e["score"] for e in dist if e["label"] in NEGATIVE_EMOTIONS)
+            total = sum(e["score"] for e in dist)
+            scores.append((pos - neg) / total if total else 0.0)
+        return scores
+
+    scores = []
+    for dist in _classify(SENTIMENT, texts)[0]:
+        top = dist[0]
+        scores.append(-top["score"] if top["label"] == "NEGATIVE" else top["score"])
+    return scores
+
+
+#RISK CLASSIFICATION (NOT PREDICTION)
+def classify_risk(sentiment_score, emotion):
+    """
+    Returns LOW / MODERATE / ELEVATED
+    """
+
+    if sentiment_score < -0.6 and emotion in ["sadness", "fear", "anger"]:
+        return "ELEVATED"
+
+    if sentiment_score < -0.3:
+        return "MODERATE"
+
+    return "LOW"
+
+
+def classify_emotions(texts, return_tokens=False):
+    """
+    GoEmotions distribution (sorted, highest first) for each text, plus
+    the per-text token counts when ``return_tokens`` is set
+    """
+    texts = list(texts)
+    if not texts:
+        return ([], []) if return_tokens else []
+
+    distributions, tokens = _classify(EMOTION, texts)
+    return (distributions, tokens) if return_tokens else distributions
+
+
+def count_tokens(texts):
+    """
+    Token counts per text (cheap: tokenizer only, no forward pass)
+    """
+    if INFERENCE_BACKEND == "stub":
+        return stub_backend.count_tokens(list(texts))
+
+    tokenizer = get_model(EMOTION).tokenizer
+    return [len(ids) for ids in tokenizer(list(texts), add_special_tokens=False)["input_ids"]]
+
+
+def embed_texts(texts):
+    """
+    L2-normalized, mean-pooled sentence embeddings (one list per text)
+    """
+    texts = list(texts)
+    if not texts:
+        return []
+
+    if INFERENCE_BACKEND == "stub":
+        return stub_backend.embed(texts)
+
+    import torch
+
+    pipe = get_model(EMBEDDING)
+    encoded = pipe.tokenizer(texts, padding=True, truncation=True, return_tensors="pt")
+    with torch.inference_mode():
+        hidden = pipe.model(**encoded).last_hidden_state
+
+    mask = encoded["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+    pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+    return torch.nn.functional.normalize(pooled, dim=-1).tolist()
+
+
+def analyze_batch(texts):
+    """
+    Emotion distribution, sentiment and risk for each text
+    """
+    texts = list(texts)
+    if not texts:
+        return []
+
+    emotions, tokens = classify_emotions(texts, return_tokens=True)
+    sentiments = _sentiment_scores(texts, emotions)
+
+    return [
+        {
+            "emotions": dist,
+            "top_emotion": dist[0],
+            "sentiment_score": sentiment,
+            "risk_level": classify_risk(sentiment, dist[0]["label"]),
+            "tokens": count
+        }
+        for dist, sentiment, count in zip(emotions, sentiments, tokens)
+    ]
+
+
+def analyze(text):
+    return text_cache.get_or_compute(
+        "analysis", text, lambda t: analyze_batch([t])[0]
+    )
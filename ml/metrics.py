@@ -0,0 +1,151 @@
+"""
+In-process metrics in the Prometheus text format
+
+Recording is a lock plus a couple of integer updates, so the hot path
+stays cheap; the text is only built when /metrics is scraped. Each
+process keeps its own numbers (prefork workers are scraped separately).
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+_metrics = []
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """
+    Latency histogram with one label (e.g. ``stage``)
+    """
+
+    def __init__(self, name, help, label, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series = {}  # label value -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def observe(self, value, seconds):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(value)
+            if series is None:
+                series = self._series[value] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += seconds
+
+    @contextmanager
+    def time(self, value):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(value, time.perf_counter() - start)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {value: list(counts) for value, counts in self._series.items()}
+
+        for value, counts in sorted(series.items()):
+            label = f'{self.label}="{value}"'
+            total = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts[:-1]):
+                total += count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {total}')
+            lines.append(f"{self.name}_sum{{{label}}} {counts[-1]!r}")
+            lines.append(f"{self.name}_count{{{label}}} {total}")
+        return lines
+
+
+class Counter:
+    """
+    Monotonic counter with one label (e.g. ``reason``). With ``collect``
+    the counts are kept elsewhere and read at scrape time (a dict of label
+    value -> number that only ever grows).
+    """
+
+    def __init__(self, name, help, label, collect=None):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.collect = collect
+        self._values = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def inc(self, value, amount=1):
+        with self._lock:
+            self._values[value] = self._values.get(value, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        if self.collect is not None:
+            try:
+                values = self.collect()
+            except Exception:
+                return lines
+        else:
+            with self._lock:
+                values = dict(self._values)
+        for value, count in sorted(values.items()):
+            lines.append(f'{self.name}{{{self.label}="{value}"}} {_format_value(count)}')
+        return lines
+
+
+class Gauge:
+    """
+    Value read from ``collect()`` at scrape time: a number, or a dict of
+    label value -> number when ``label`` is set
+    """
+
+    def __init__(self, name, help, collect, label=None):
+        self.name = name
+        self.help = help
+        self.collect = collect
+        self.label = label
+        _metrics.append(self)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        try:
+            value = self.collect()
+        except Exception:
+            return lines
+
+        if self.label is None:
+            lines.append(f"{self.name} {_format_value(value)}")
+        else:
+            for key, number in sorted(value.items()):
+                lines.append(f'{self.name}{{{self.label}="{key}"}} {_format_value(number)}')
+        return lines
+
+
+def render():
+    """
+    All metrics of this process in the Prometheus text exposition format
+    """
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Shared by the chatbot and the UI
+stage_seconds = Histogram(
+    "chat_stage_seconds", "Time spent per /chat stage", label="stage"
+)
+fallbacks = Counter(
+    "chat_fallback_total", "Replies served from the fallback, by reason", label="reason"
+)
@@ -0,0 +1,100 @@
+"""
+Dynamic micro-batching for transformer inference
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """
+    Collects concurrent requests for up to ``max_wait_ms`` (or until
+    ``max_batch_size`` items are waiting), runs them through ``batch_fn``
+    as a single batch and hands every caller its own result.
+
+    ``batch_fn`` takes a list of items and must return a list of results
+    in the same order.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=16, max_wait_ms=5.0):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._lock = threading.Lock()
+        self._queue = None
+        self._worker = None
+        self._pid = None
+
+    def submit(self, item):
+        """
+        Queue one item and return a Future for its result
+        """
+        future = Future()
+        self._ensure_worker().put((item, future))
+        return future
+
+    def __call__(self, item, timeout=None):
+        return self.submit(item).result(timeout)
+
+    def _ensure_worker(self):
+        # Threads do not survive fork(), so each process gets its own worker
+        pid = os.getpid()
+        if self._pid == pid and self._worker.is_alive():
+            return self._queue
+
+        with self._lock:
+            if self._pid != pid:
+                self._queue = queue.Queue()
+            if self._pid != pid or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run,
+                    args=(self._queue,),
+                    name="micro-batcher",
+                    daemon=True
+                )
+                self._worker.start()
+                self._pid = pid
+        return self._queue
+
+    def _run(self, pending):
+        while True:
+            batch = [pending.get()]
+            deadline = time.monotonic() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        batch.append(pending.get(timeout=remaining))
+                    else:
+                        batch.append(pending.get_nowait())
+                except queue.Empty:
+                    break
+
+            self._process(batch)
+
+    def _process(self, batch):
+        batch = [
+            (item, future) for item, future in batch
+            if future.set_running_or_notify_cancel()
+        ]
+        if not batch:
+            return
+
+        try:
+            results = list(self.batch_fn([item for item, _ in batch]))
+            if len(results) != len(batch):
+                # zip() would leave the extra callers waiting forever
+                raise ValueError(
+                    f"batch_fn returned {len(results)} results for {len(batch)} items"
+                )
+        except Exception as exc:
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
@@ -0,0 +1,114 @@
+"""
+Lazy, offline-first registry for transformer pipelines
+
+Models are registered by name at import time (cheap) and only built on
+first use. With MODEL_OFFLINE=1 (the default) everything is resolved from
+the local Hugging Face cache and no network calls are made.
+"""
+import os
+import threading
+import time
+
+MODEL_OFFLINE = os.environ.get("MODEL_OFFLINE", "1") == "1"
+
+# "torch" (default) or "onnx" for the classification pipelines; "stub"
+# replaces every model with a keyword-based stand-in (benchmarks, CI)
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "torch")
+ONNX_TASKS = ("text-classification", "sentiment-analysis")
+
+if MODEL_OFFLINE:
+    # Must be set before transformers / huggingface_hub are imported
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+WARMUP_TEXT = "I have been feeling a little tired and anxious today."
+
+_registry = {}
+_models = {}
+_load_times = {}
+_lock = threading.Lock()
+
+
+def register(name, factory, warmup_input=WARMUP_TEXT, warmup_kwargs=None):
+    """
+    Register a zero-argument ``factory`` that builds the model ``name``
+    """
+    with _lock:
+        if name not in _registry:
+            _registry[name] = {
+                "factory": factory,
+                "lock": threading.Lock(),
+                "warmup_input": warmup_input,
+                "warmup_kwargs": warmup_kwargs or {}
+            }
+
+
+def register_pipeline(name, task, model, warmup_input=WARMUP_TEXT, warmup_kwargs=None,
+                      backend=None, **kwargs):
+    """
+    Register a ``transformers.pipeline`` that is built on first use.
+    Classification pipelines run on ONNX Runtime when INFERENCE_BACKEND=onnx;
+    ``backend`` pins one backend for this model regardless of the setting.
+    """
+    model_kwargs = dict(kwargs.pop("model_kwargs", {}))
+    if MODEL_OFFLINE:
+        model_kwargs["local_files_only"] = True
+
+    def factory():
+        selected = backend or INFERENCE_BACKEND
+        if selected == "stub":
+            from stub_backend import StubPipeline
+            return StubPipeline(task)
+
+        if selected == "onnx" and task in ONNX_TASKS:
+            from onnx_backend import onnx_pipeline
+            return onnx_pipeline(task, model=model, model_kwargs=model_kwargs, **kwargs)
+
+        from transformers import pipeline
+
+        return pipeline(task, model=model, model_kwargs=model_kwargs, **kwargs)
+
+    register(name, factory, warmup_input, warmup_kwargs)
+
+
+def get_model(name):
+    """
+    Return the model ``name``, loading it on first call
+    """
+    model = _models.get(name)
+    if model is not None:
+        return model
+
+    entry = _registry[name]
+    with entry["lock"]:
+        model = _models.get(name)
+        if model is None:
+            start = time.perf_counter()
+            model = entry["factory"]()
+            _load_times[name] = time.perf_counter() - start
+            _models[name] = model
+    return model
+
+
+def is_loaded(name):
+    return name in _models
+
+
+def warmup(names=None):
+    """
+    Load the given (default: all registered) models and run one synthetic
+    input through each so the first real request doesn't pay for it
+    """
+    for name in names or list(_registry):
+        model = get_model(name)
+        entry = _registry[name]
+        if entry["warmup_input"] is not None:
+            model(entry["warmup_input"], **entry["warmup_kwargs"])
+    return load_times()
+
+
+def load_times():
+    """
+    Seconds spent loading each model so far
+    """
+    return dict(_load_times)
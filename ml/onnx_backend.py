@@ -0,0 +1,78 @@
+"""
+ONNX Runtime backend for the sequence-classification pipelines
+
+Models are exported once to ONNX_CACHE_DIR (optionally with dynamic int8
+quantization) and then served through a regular transformers pipeline, so
+callers see exactly the same output format as the PyTorch path.
+"""
+import os
+import shutil
+
+ONNX_CACHE_DIR = os.environ.get(
+    "ONNX_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "onnx_models")
+)
+ONNX_QUANTIZE = os.environ.get("ONNX_QUANTIZE", "0") == "1"
+
+QUANTIZED_FILE = "model_quantized.onnx"
+
+
+def _export_dir(model_id, quantize):
+    name = model_id.replace("/", "__")
+    if quantize:
+        name += "-int8"
+    return os.path.join(ONNX_CACHE_DIR, name)
+
+
+def export_model(model_id, quantize=ONNX_QUANTIZE, local_files_only=False):
+    """
+    Export ``model_id`` to ONNX (and quantize it) unless already cached.
+    Returns ``(directory, onnx_file_name)``.
+    """
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    fp32_dir = _export_dir(model_id, quantize=False)
+    if not os.path.exists(os.path.join(fp32_dir, "model.onnx")):
+        model = ORTModelForSequenceClassification.from_pretrained(
+            model_id, export=True, local_files_only=local_files_only
+        )
+        model.save_pretrained(fp32_dir)
+        AutoTokenizer.from_pretrained(
+            model_id, local_files_only=local_files_only
+        ).save_pretrained(fp32_dir)
+
+    if not quantize:
+        return fp32_dir, "model.onnx"
+
+    int8_dir = _export_dir(model_id, quantize=True)
+    if not os.path.exists(os.path.join(int8_dir, QUANTIZED_FILE)):
+        quantizer = ORTQuantizer.from_pretrained(fp32_dir)
+        qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+        quantizer.quantize(save_dir=int8_dir, quantization_config=qconfig)
+
+        # Tokenizer and config files are needed to load from int8_dir alone
+        for name in os.listdir(fp32_dir):
+            if not name.endswith(".onnx"):
+                shutil.copy(os.path.join(fp32_dir, name), int8_dir)
+
+    return int8_dir, QUANTIZED_FILE
+
+
+def onnx_pipeline(task, model, quantize=ONNX_QUANTIZE, model_kwargs=None, **kwargs):
+    """
+    Drop-in replacement for ``transformers.pipeline`` backed by ONNX Runtime
+    """
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+    from transformers import AutoTokenizer, pipeline
+
+    local_files_only = (model_kwargs or {}).get("local_files_only", False)
+    directory, file_name = export_model(model, quantize, local_files_only)
+
+    ort_model = ORTModelForSequenceClassification.from_pretrained(
+        directory, file_name=file_name
+    )
+    tokenizer = AutoTokenizer.from_pretrained(directory)
+
+    return pipeline(task, model=ort_model, tokenizer=tokenizer, **kwargs)
@@ -0,0 +1,127 @@
+"""
+Parity check: ONNX Runtime backend vs the PyTorch pipelines
+
+Runs every pattern from the intents dataset through the service's own
+classification path (inference_service._classify) on both backends and
+reports top-label agreement and score drift per model. Exits non-zero
+when a model falls outside the thresholds.
+
+    python onnx_parity.py --quantize
+"""
+import argparse
+import json
+import os
+import sys
+
+import inference_service
+from inference_service import EMOTION, EMOTION_MODEL_ID, SENTIMENT, SENTIMENT_MODEL_ID, _classify
+from model_registry import register_pipeline
+
+INTENTS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "Chatbot", "data", "mental_health_intents.json"
+)
+
+# The classifiers the service actually serves: registry name -> (model, task)
+MODELS = {
+    EMOTION: (EMOTION_MODEL_ID, "text-classification"),
+    SENTIMENT: (SENTIMENT_MODEL_ID, "sentiment-analysis"),
+}
+
+
+def load_patterns(limit=None):
+    with open(INTENTS_PATH, "r", encoding="utf-8") as f:
+        intents = json.load(f)["intents"]
+
+    patterns = [p for intent in intents for p in intent.get("patterns", [])]
+    return patterns[:limit] if limit else patterns
+
+
+def compare_outputs(reference, candidate):
+    """
+    Top-label agreement and score drift between two lists of
+    distributions (one per text)
+    """
+    agree = 0
+    top_drift = []
+    max_label_drift = 0.0
+
+    for ref, got in zip(reference, candidate):
+        ref_scores = {r["label"]: r["score"] for r in ref}
+        got_scores = {g["label"]: g["score"] for g in got}
+
+        ref_top = max(ref, key=lambda x: x["score"])
+        got_top = max(got, key=lambda x: x["score"])
+        if ref_top["label"] == got_top["label"]:
+            agree += 1
+
+        top_drift.append(abs(ref_top["score"] - got_scores[ref_top["label"]]))
+        max_label_drift = max(
+            max_label_drift,
+            max(abs(ref_scores[label] - got_scores[label]) for label in ref_scores)
+        )
+
+    return {
+        "agreement": agree / len(top_drift),
+        "mean_top_drift": sum(top_drift) / len(top_drift),
+        "max_top_drift": max(top_drift),
+        "max_label_drift": max_label_drift,
+    }
+
+
+def compare(name, texts, quantize, batch_size=32):
+    """
+    Run ``texts`` through inference_service._classify (the same windowing,
+    batching and aggregation the service uses) on PyTorch and on ONNX
+    """
+    model_id, task = MODELS[name]
+    register_pipeline(f"{name}:torch", task, model=model_id, backend="torch", top_k=None)
+    register_pipeline(
+        f"{name}:onnx", task, model=model_id, backend="onnx", quantize=quantize, top_k=None
+    )
+
+    outputs = {}
+    for backend in ("torch", "onnx"):
+        outputs[backend] = []
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            outputs[backend].extend(_classify(f"{name}:{backend}", batch)[0])
+
+    return compare_outputs(outputs["torch"], outputs["onnx"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quantize", action="store_true", help="compare the int8 model")
+    parser.add_argument("--limit", type=int, default=None, help="only use the first N patterns")
+    parser.add_argument("--min-agreement", type=float, default=0.98)
+    parser.add_argument("--max-drift", type=float, default=None,
+                        help="max top-label score drift (default 0.01 fp32, 0.1 int8)")
+    args = parser.parse_args()
+
+    max_drift = args.max_drift
+    if max_drift is None:
+        max_drift = 0.1 if args.quantize else 0.01
+
+    if inference_service.INFERENCE_BACKEND == "stub":
+        sys.exit("INFERENCE_BACKEND=stub has no models to compare")
+
+    texts = load_patterns(args.limit)
+    print(f"Comparing {len(texts)} patterns (quantize={args.quantize})\n")
+
+    failed = False
+    for name, (model_id, _) in MODELS.items():
+        result = compare(name, texts, args.quantize)
+        ok = result["agreement"] >= args.min_agreement and result["max_top_drift"] <= max_drift
+        failed = failed or not ok
+
+        print(model_id)
+        for key, value in result.items():
+            print(f"  {key:16} {value:.4f}")
+        print(f"  {'status':16} {'OK' if ok else 'FAIL'}\n")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
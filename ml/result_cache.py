@@ -0,0 +1,116 @@
+"""
+Bounded LRU + TTL cache for model results keyed on normalized text
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+_PUNCTUATION = re.compile(r"[^\w\s]+", re.UNICODE)
+_WHITESPACE = re.compile(r"\s+")
+
+_MISSING = object()
+
+
+def normalize_text(text):
+    """
+    Lowercase, drop punctuation and collapse whitespace so that
+    "Hi!", "hi" and "  HI " share one cache entry
+    """
+    text = _PUNCTUATION.sub("", text.lower())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class ResultCache:
+    """
+    Thread-safe memoization layer with size (LRU) and age (TTL) eviction.
+    Entries are keyed on ``(namespace, normalize_text(text))`` so several
+    entry points can share one cache without colliding.
+    """
+
+    def __init__(self, maxsize=4096, ttl=3600):
+        self.maxsize = int(maxsize)
+        self.ttl = float(ttl)
+
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = {}
+        self._misses = {}
+        self.evictions = 0
+
+    def get(self, namespace, text, default=None):
+        key = (namespace, normalize_text(text))
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    self._hits[namespace] = self._hits.get(namespace, 0) + 1
+                    return value
+                del self._data[key]
+                self.evictions += 1
+
+            self._misses[namespace] = self._misses.get(namespace, 0) + 1
+            return default
+
+    def set(self, namespace, text, value):
+        if self.maxsize <= 0:
+            return
+
+        key = (namespace, normalize_text(text))
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, namespace, text, compute):
+        """
+        Return the cached result for ``text`` or call ``compute(text)``
+        and remember it. Text that normalizes to nothing is never cached.
+        """
+        if not normalize_text(text):
+            return compute(text)
+
+        value = self.get(namespace, text, _MISSING)
+        if value is _MISSING:
+            value = compute(text)
+            self.set(namespace, text, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            namespaces = sorted(set(self._hits) | set(self._misses))
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": sum(self._hits.values()),
+                "misses": sum(self._misses.values()),
+                "evictions": self.evictions,
+                "namespaces": {
+                    ns: {
+                        "hits": self._hits.get(ns, 0),
+                        "misses": self._misses.get(ns, 0)
+                    }
+                    for ns in namespaces
+                }
+            }
+
+
+# Shared by detect_emotion() and analyze_text()
+text_cache = ResultCache(
+    maxsize=int(os.environ.get("RESULT_CACHE_SIZE", 4096)),
+    ttl=float(os.environ.get("RESULT_CACHE_TTL", 3600))
+)
@@ -0,0 +1,126 @@
+"""
+Deterministic stand-in for the transformer models (INFERENCE_BACKEND=stub)
+
+Keyword-based, dependency-free and fast, so the serving stack can be
+exercised and benchmarked on a box without torch, model weights or a
+network connection. Scores are not meaningful beyond that.
+"""
+import hashlib
+import math
+import os
+import time
+
+# Simulated model time per batch
+STUB_LATENCY_MS = float(os.environ.get("STUB_LATENCY_MS", 0))
+
+EMBEDDING_DIM = 64
+
+GO_EMOTIONS = [
+    "admiration", "amusement", "anger", "annoyance", "approval", "caring",
+    "confusion", "curiosity", "desire", "disappointment", "disapproval",
+    "disgust", "embarrassment", "excitement", "fear", "gratitude", "grief",
+    "joy", "love", "nervousness", "optimism", "pride", "realization",
+    "relief", "remorse", "sadness", "surprise", "neutral"
+]
+
+KEYWORDS = {
+    "sadness": ["sad", "depressed", "down", "cry", "unhappy", "empty", "hopeless"],
+    "nervousness": ["anxious", "anxiety", "nervous", "worried", "panic", "stress"],
+    "fear": ["scared", "afraid", "fear", "terrified"],
+    "anger": ["angry", "hate", "furious", "mad"],
+    "annoyance": ["annoyed", "irritated", "frustrated"],
+    "grief": ["lost", "died", "death", "grief"],
+    "joy": ["happy", "great", "good", "glad", "awesome"],
+    "gratitude": ["thanks", "thank"],
+    "optimism": ["hope", "better", "hopeful"],
+    "relief": ["relieved", "relief", "calm"],
+}
+
+NEGATIVE = {"sadness", "nervousness", "fear", "anger", "annoyance", "grief"}
+
+
+def _delay():
+    if STUB_LATENCY_MS > 0:
+        time.sleep(STUB_LATENCY_MS / 1000.0)
+
+
+def _words(text):
+    return text.lower().split()
+
+
+def _emotion_distribution(text):
+    words = _words(text)
+    hits = {
+        label: sum(1 for w in words for k in keys if w.startswith(k))
+        for label, keys in KEYWORDS.items()
+    }
+    top = max(hits, key=hits.get)
+    if hits[top] == 0:
+        top = "neutral"
+
+    scores = {label: 0.01 for label in GO_EMOTIONS}
+    scores[top] = min(0.99, 0.6 + 0.1 * max(1, hits.get(top, 0)))
+    return sorted(
+        ({"label": label, "score": score} for label, score in scores.items()),
+        key=lambda x: x["score"],
+        reverse=True
+    )
+
+
+def _sentiment_distribution(text):
+    top = _emotion_distribution(text)[0]["label"]
+    negative = 0.9 if top in NEGATIVE else 0.2
+    return sorted(
+        [
+            {"label": "NEGATIVE", "score": negative},
+            {"label": "POSITIVE", "score": 1.0 - negative}
+        ],
+        key=lambda x: x["score"],
+        reverse=True
+    )
+
+
+def classify(name, texts):
+    """
+    Same shape as inference_service._classify: (distributions, token_counts)
+    """
+    _delay()
+    texts = list(texts)
+    make = _sentiment_distribution if name == "sentiment" else _emotion_distribution
+    return [make(t) for t in texts], count_tokens(texts)
+
+
+def count_tokens(texts):
+    return [len(_words(t)) for t in texts]
+
+
+def embed(texts):
+    """
+    Hashed bag-of-words vectors, L2-normalized
+    """
+    _delay()
+    vectors = []
+    for text in texts:
+        vec = [0.0] * EMBEDDING_DIM
+        for word in _words(text):
+            digest = hashlib.md5(word.encode("utf-8")).digest()
+            vec[digest[0] % EMBEDDING_DIM] += 1.0
+        norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+        vectors.append([v / norm for v in vec])
+    return vectors
+
+
+class StubPipeline:
+    """
+    Callable placeholder returned by the model registry in stub mode
+    """
+
+    def __init__(self, task):
+        self.task = task
+
+    def __call__(self, inputs, **kwargs):
+        texts = [inputs] if isinstance(inputs, str) else list(inputs)
+        if self.task == "feature-extraction":
+            return embed(texts)
+        name = "sentiment" if self.task == "sentiment-analysis" else "emotion"
+        return classify(name, texts)[0]
@@ -0,0 +1,28 @@
+import os
+import sys
+import time
+
+import pytest
+
+# Modules in Chatbot/ and ml/ import each other by bare name
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "ml"), os.path.join(ROOT, "Chatbot")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# Never load the real models in tests
+os.environ.setdefault("INFERENCE_BACKEND", "stub")
+
+
+@pytest.fixture
+def wait_until():
+    """
+    Poll ``predicate`` until it is true; fail the test after ``timeout``
+    """
+    def wait(predicate, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not predicate():
+            if time.monotonic() > deadline:
+                pytest.fail(f"condition not met within {timeout}s")
+            time.sleep(0.005)
+    return wait
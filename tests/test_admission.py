@@ -0,0 +1,115 @@
+import asyncio
+import threading
+
+import pytest
+
+from admission import AdmissionController, Overloaded
+
+
+def test_priority_order(wait_until):
+    controller = AdmissionController(slots=1, max_queue=4, timeout=5)
+    controller.acquire(2)
+    order = []
+
+    def waiter(priority):
+        controller.acquire(priority)
+        order.append(priority)
+        controller.release()
+
+    threads = [threading.Thread(target=waiter, args=(p,)) for p in (2, 0, 1)]
+    for thread in threads:
+        thread.start()
+    wait_until(lambda: controller.queue_depth() == 3)
+    controller.release()
+    for thread in threads:
+        thread.join(5)
+
+    assert order == [0, 1, 2]
+    assert controller.stats()["in_use"] == 0
+
+
+def test_queue_full_and_displacement():
+    controller = AdmissionController(slots=1, max_queue=1, timeout=0.2)
+    controller.acquire(0)
+    low = controller._enqueue(2)
+
+    with pytest.raises(Overloaded) as rejected:
+        controller.acquire(2)
+    assert rejected.value.reason == "queue_full"
+
+    high = controller._enqueue(0)
+    with pytest.raises(Overloaded) as displaced:
+        low.result(0)
+    assert displaced.value.reason == "displaced"
+
+    controller.release()
+    assert high.result(0) is True
+    controller.release()
+    assert controller.stats()["in_use"] == 0
+
+
+def test_resize_admits_waiters():
+    controller = AdmissionController(slots=1, max_queue=1, timeout=1)
+    controller.acquire(0)
+    waiting = controller._enqueue(1)
+
+    controller.resize(slots=2, max_queue=8)
+    assert waiting.result(0) is True
+    assert controller.stats()["in_use"] == 2
+    assert controller.stats()["max_queue"] == 8
+
+
+def test_timeout_leaves_queue():
+    controller = AdmissionController(slots=1, max_queue=2, timeout=0.05)
+    controller.acquire(0)
+    with pytest.raises(Overloaded) as timed_out:
+        controller.acquire(0)
+    assert timed_out.value.reason == "timeout"
+    assert controller.queue_depth() == 0
+    controller.release()
+    assert controller.stats()["in_use"] == 0
+
+
+def test_cancelled_async_waiter_frees_its_place():
+    controller = AdmissionController(slots=1, max_queue=2, timeout=5)
+
+    async def scenario():
+        await controller.acquire_async(0)
+        waiter = asyncio.ensure_future(controller.acquire_async(0))
+        await asyncio.sleep(0.01)
+        assert controller.queue_depth() == 1
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert controller.queue_depth() == 0
+
+        controller.release()
+        assert controller.stats()["in_use"] == 0
+
+        # The slot is still usable
+        async with controller.admit_async(0):
+            pass
+
+    asyncio.run(scenario())
+    assert controller.stats()["in_use"] == 0
+
+
+def test_cancel_after_grant_releases_slot():
+    controller = AdmissionController(slots=1, max_queue=2, timeout=5)
+
+    async def scenario():
+        await controller.acquire_async(0)
+        waiter = asyncio.ensure_future(controller.acquire_async(0))
+        await asyncio.sleep(0.01)
+
+        # The slot is granted, but the waiter is cancelled before it resumes
+        controller.release()
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    asyncio.run(scenario())
+    stats = controller.stats()
+    assert stats["in_use"] == 0
+    assert stats["queue_depth"] == 0
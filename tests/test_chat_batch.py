@@ -0,0 +1,66 @@
+import json
+import os
+
+import pytest
+
+CHATBOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Chatbot")
+
+
+@pytest.fixture
+def server(monkeypatch):
+    # response.py loads the response bank relative to Chatbot/
+    monkeypatch.chdir(CHATBOT)
+    import response
+    import server
+
+    monkeypatch.setattr(response, "USE_LOCAL_LLM", False)
+    return server
+
+
+def post_ndjson(client, lines):
+    return client.post("/chat/batch", data="\n".join(lines), content_type="application/x-ndjson")
+
+
+def test_batch_results_in_input_order(server):
+    client = server.app.test_client()
+    lines = [json.dumps({"session_id": f"s{i % 3}", "message": "I feel sad"}) for i in range(7)]
+    lines.insert(2, "")
+    resp = post_ndjson(client, lines)
+    assert resp.status_code == 200
+    results = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert [r["index"] for r in results] == list(range(7))
+    assert all(r["response"] for r in results)
+
+
+def test_malformed_ndjson_is_a_400_with_line_number(server):
+    client = server.app.test_client()
+    resp = post_ndjson(client, ['{"message": "hi"}', "{not json"])
+    assert resp.status_code == 400
+    assert resp.get_json()["error"].startswith("line 2:")
+
+    resp = post_ndjson(client, ['{"message": "hi"}', "", "[1, 2]"])
+    assert resp.status_code == 400
+    assert resp.get_json()["error"].startswith("line 3:")
+
+
+def test_invalid_json_items_are_a_400(server):
+    client = server.app.test_client()
+    assert client.post("/chat/batch", json={"items": "nope"}).status_code == 400
+    resp = client.post("/chat/batch", json={"items": [{"message": "hi"}, {"message": 5}]})
+    assert resp.status_code == 400
+    assert resp.get_json()["error"].startswith("item 1:")
+
+
+def test_batch_turns_go_through_admission(server, monkeypatch):
+    import batch_chat
+    from admission import AdmissionController
+
+    # No free slot and no queue: every turn is shed
+    controller = AdmissionController(slots=0, max_queue=0, timeout=0.01)
+    monkeypatch.setattr(batch_chat, "admission", controller)
+
+    client = server.app.test_client()
+    resp = client.post("/chat/batch", json={"items": [{"message": "I feel sad"}]})
+    result = json.loads(resp.get_data(as_text=True))
+    assert result["error"] == "busy"
+    assert controller.stats()["rejected"] == {"queue_full": 1}
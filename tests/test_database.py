@@ -0,0 +1,58 @@
+from sqlalchemy import inspect, select, text
+
+from Database.database import bulk_insert, init_db, make_engine
+from Database.models import MentalHealthFeature
+
+
+def test_production_profile_pragmas_and_pool(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'prod.db'}", profile="production")
+    try:
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert conn.execute(text("PRAGMA temp_store")).scalar() == 2  # MEMORY
+        assert engine.pool.size() > 1
+    finally:
+        engine.dispose()
+
+
+def test_dev_profile_keeps_sqlite_defaults(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'dev.db'}", profile="dev")
+    try:
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "delete"
+    finally:
+        engine.dispose()
+
+
+def test_init_db_adds_missing_indexes(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'old.db'}", profile="dev")
+    try:
+        init_db(engine)
+        table = MentalHealthFeature.__tablename__
+        expected = {index.name for index in MentalHealthFeature.__table__.indexes}
+        with engine.begin() as conn:
+            for name in expected:
+                conn.execute(text(f"DROP INDEX {name}"))
+
+        init_db(engine)
+        assert expected <= {index["name"] for index in inspect(engine).get_indexes(table)}
+    finally:
+        engine.dispose()
+
+
+def test_bulk_insert_chunks_in_one_transaction():
+    engine = make_engine("sqlite://")
+    init_db(engine)
+    table = MentalHealthFeature.__table__
+    rows = [
+        {"emotion": "joy", "emotion_score": 0.5, "sentiment_score": 0.1,
+         "message_length": i, "sadness_streak": 0, "risk_level": "LOW"}
+        for i in range(25)
+    ]
+    chunks = []
+
+    assert bulk_insert(table, rows, engine, chunk_size=10, on_chunk=lambda conn, c: chunks.append(len(c))) == 25
+    assert chunks == [10, 10, 5]
+    with engine.connect() as conn:
+        assert conn.execute(select(table.c.message_length)).scalars().all() == list(range(25))
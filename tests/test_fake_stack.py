@@ -0,0 +1,88 @@
+import json
+import math
+import urllib.error
+import urllib.request
+
+import pytest
+
+import stub_backend
+from fake_ollama import FakeOllamaHandler, FakeOllamaServer, start_fake_ollama
+from load_test import parse_server_timing, percentile
+
+
+@pytest.fixture
+def fake_ollama():
+    servers = []
+
+    def start(**kwargs):
+        server = start_fake_ollama(**kwargs)
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}/api/generate"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def post(url, body):
+    request = urllib.request.Request(url, data=json.dumps(body).encode("utf-8"))
+    with urllib.request.urlopen(request, timeout=5) as resp:
+        return resp.read().decode("utf-8")
+
+
+def test_fake_ollama_reply_and_context(fake_ollama):
+    url = fake_ollama(latency_ms=0, tokens_per_sec=0, reply_tokens=4)
+    reply = json.loads(post(url, {"prompt": "abcdefgh", "stream": False, "context": [9]}))
+    assert len(reply["response"].split()) == 4
+    assert reply["done"] and reply["context"] == [9, 0, 1]
+
+    lines = [json.loads(line) for line in post(url, {"prompt": "hi"}).splitlines()]
+    assert "".join(line["response"] for line in lines) == reply["response"]
+    assert lines[-1]["done"]
+
+
+def test_fake_ollama_failures(fake_ollama):
+    url = fake_ollama(latency_ms=0, failure_rate=1.0)
+    with pytest.raises(urllib.error.HTTPError) as failed:
+        post(url, {"prompt": "hi"})
+    assert failed.value.code == 503
+
+
+def test_stub_backend_is_deterministic():
+    texts = ["I am so anxious and worried", "thank you"]
+    first, tokens = stub_backend.classify("emotion", texts)
+    assert first == stub_backend.classify("emotion", texts)[0]
+    assert [d[0]["label"] for d in first] == ["nervousness", "gratitude"]
+    assert tokens == [6, 2]
+
+    sentiment = stub_backend.classify("sentiment", texts)[0]
+    assert [d[0]["label"] for d in sentiment] == ["NEGATIVE", "POSITIVE"]
+
+    for vector in stub_backend.embed(texts):
+        assert len(vector) == stub_backend.EMBEDDING_DIM
+        assert math.isclose(sum(v * v for v in vector), 1.0)
+
+
+def test_load_test_helpers():
+    assert percentile([], 95) == 0.0
+    assert percentile(list(range(1, 101)), 95) == 95
+    assert parse_server_timing("emotion;dur=1.5, llm;dur=20,bad") == {"emotion": 1.5, "llm": 20.0}
+
+
+
+def test_client_disconnect_is_not_reported(capsys):
+    server = FakeOllamaServer(("127.0.0.1", 0), FakeOllamaHandler)
+    try:
+        try:
+            raise ConnectionResetError(104, "Connection reset by peer")
+        except ConnectionResetError:
+            server.handle_error(None, ("127.0.0.1", 1))
+        assert capsys.readouterr().err == ""
+
+        try:
+            raise ValueError("real bug")
+        except ValueError:
+            server.handle_error(None, ("127.0.0.1", 1))
+        assert "ValueError" in capsys.readouterr().err
+    finally:
+        server.server_close()
@@ -0,0 +1,113 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from Database.database import init_db, make_engine
+from Database.feature_writer import COLUMNS, FeatureWriter, feature_row
+from Database.models import FeatureDailyRollup, MentalHealthFeature
+
+ANALYZE_ROW = {
+    "timestamp": "2025-05-01T10:00:00+00:00",
+    "emotion": "sadness",
+    "emotion_score": 0.9,
+    "sentiment_score": -0.8,
+    "message_length": 5,
+    "risk_level": "ELEVATED"
+}
+MOOD_ROW = dict(ANALYZE_ROW, timestamp=datetime(2025, 5, 1, 11), sadness_streak=4)
+
+
+@pytest.fixture
+def engine():
+    engine = make_engine("sqlite://")
+    init_db(engine)
+    yield engine
+    engine.dispose()
+
+
+def stored(engine):
+    table = MentalHealthFeature.__table__
+    with engine.connect() as conn:
+        return conn.execute(select(table).order_by(table.c.id)).mappings().all()
+
+
+def test_feature_row_has_every_column_as_naive_utc():
+    row = feature_row({
+        "timestamp": "2025-05-01T10:00:00-05:00", "emotion": "joy", "sentiment_score": 0.5
+    })
+    assert tuple(row) == COLUMNS
+    assert row["timestamp"] == datetime(2025, 5, 1, 15)
+    assert row["sadness_streak"] == 0 and row["risk_level"] == "LOW"
+
+    aware = datetime(2025, 5, 1, 10, tzinfo=timezone(timedelta(hours=2)))
+    assert feature_row(dict(ANALYZE_ROW, timestamp=aware))["timestamp"] == datetime(2025, 5, 1, 8)
+    assert feature_row(dict(ANALYZE_ROW, timestamp=None))["timestamp"].tzinfo is None
+
+
+@pytest.mark.parametrize("order", [(ANALYZE_ROW, MOOD_ROW), (MOOD_ROW, ANALYZE_ROW)])
+def test_mixed_key_sets_share_a_batch(engine, order):
+    writer = FeatureWriter(engine, batch_size=10, flush_interval=10)
+    for features in order:
+        assert writer.submit(features)
+    writer.close()
+
+    assert writer.stats()["written"] == 2
+    streaks = sorted(row["sadness_streak"] for row in stored(engine))
+    assert streaks == [0, 4]
+
+    with engine.connect() as conn:
+        rollup = conn.execute(select(FeatureDailyRollup.__table__)).one()
+    assert rollup.row_count == 2 and rollup.sadness_streak_sum == 4
+
+
+def test_flushes_when_batch_is_full(engine, wait_until):
+    writer = FeatureWriter(engine, batch_size=3, flush_interval=30)
+    for _ in range(3):
+        writer.submit(ANALYZE_ROW)
+    wait_until(lambda: writer.stats()["written"] == 3)
+    assert writer.stats()["batches"] == 1
+    writer.close()
+
+
+def test_flushes_after_interval(engine, wait_until):
+    writer = FeatureWriter(engine, batch_size=100, flush_interval=0.05)
+    writer.submit(ANALYZE_ROW)
+    wait_until(lambda: writer.stats()["written"] == 1, timeout=2)
+    writer.close()
+
+
+def test_close_drains_pending_rows(engine):
+    writer = FeatureWriter(engine, batch_size=100, flush_interval=30)
+    for _ in range(5):
+        writer.submit(ANALYZE_ROW)
+    writer.close()
+    assert writer.stats()["written"] == 5
+    assert len(stored(engine)) == 5
+    # Closed writers refuse new rows
+    assert not writer.submit(ANALYZE_ROW)
+
+
+def test_full_queue_drops_rows(engine, wait_until, monkeypatch):
+    writer = FeatureWriter(engine, batch_size=1, max_queue=1, put_timeout=0.01)
+    release = threading.Event()
+    inserting = threading.Event()
+    insert = writer._insert
+
+    def slow_insert(rows):
+        inserting.set()
+        release.wait(5)
+        insert(rows)
+
+    monkeypatch.setattr(writer, "_insert", slow_insert)
+
+    assert writer.submit(ANALYZE_ROW)        # taken by the worker
+    wait_until(inserting.is_set)
+    assert writer.submit(ANALYZE_ROW)        # fills the queue
+    assert not writer.submit(ANALYZE_ROW)    # dropped
+    assert writer.stats()["dropped"] == 1
+
+    release.set()
+    writer.close()
+    assert writer.stats()["written"] == 2
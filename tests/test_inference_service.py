@@ -0,0 +1,66 @@
+import inference_service
+from inference_service import _windows, truncated_texts
+
+
+def test_short_text_is_one_window():
+    assert _windows(list(range(5)), 10) == [list(range(5))]
+
+
+def test_windows_cover_text_with_overlap(monkeypatch):
+    monkeypatch.setattr(inference_service, "CHUNK_STRIDE", 2)
+    ids = list(range(30))
+    windows = _windows(ids, 10)
+    assert windows[0][0] == 0 and windows[-1][-1] == 29
+    assert all(len(w) == 10 for w in windows)
+    assert set().union(*windows) == set(ids)
+
+
+def test_window_cap_drops_middle_and_is_counted(monkeypatch):
+    monkeypatch.setattr(inference_service, "CHUNK_STRIDE", 2)
+    monkeypatch.setattr(inference_service, "CHUNK_MAX_WINDOWS", 3)
+    before = truncated_texts._values.get("chunk", 0)
+
+    windows = _windows(list(range(100)), 10)
+    assert [w[0] for w in windows] == [0, 8, 90]
+    assert truncated_texts._values["chunk"] == before + 1
+
+    _windows(list(range(20)), 10)  # fits in 3 windows
+    assert truncated_texts._values["chunk"] == before + 1
+
+
+def test_truncate_mode_is_counted(monkeypatch):
+    monkeypatch.setattr(inference_service, "LONG_TEXT_MODE", "truncate")
+    before = truncated_texts._values.get("truncate", 0)
+    assert _windows(list(range(20)), 10) == [list(range(10))]
+    assert truncated_texts._values["truncate"] == before + 1
+
+
+def test_classify_risk():
+    from inference_service import classify_risk
+
+    assert classify_risk(-0.9, "sadness") == "ELEVATED"
+    assert classify_risk(-0.9, "annoyance") == "MODERATE"
+    assert classify_risk(-0.4, "fear") == "MODERATE"
+    assert classify_risk(0.2, "sadness") == "LOW"
+
+
+def test_analyze_batch_matches_analyze():
+    from inference_service import analyze, analyze_batch
+
+    texts = ["I feel so sad and hopeless", "thanks, I am glad today"]
+    batch = analyze_batch(texts)
+    assert [r["top_emotion"]["label"] for r in batch] == ["sadness", "gratitude"]
+    assert batch[0]["sentiment_score"] < 0 < batch[1]["sentiment_score"]
+    assert batch[0]["risk_level"] == "ELEVATED"
+    assert [r["tokens"] for r in batch] == [6, 5]
+    assert analyze(texts[0]) == batch[0]
+    assert analyze_batch([]) == []
+
+
+def test_sentiment_from_emotions(monkeypatch):
+    from inference_service import analyze_batch
+
+    monkeypatch.setattr(inference_service, "SENTIMENT_SOURCE", "emotions")
+    sad, neutral = analyze_batch(["I feel sad", "the bus is at noon"])
+    assert -1 <= sad["sentiment_score"] < 0
+    assert neutral["sentiment_score"] == 0
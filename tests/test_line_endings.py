@@ -0,0 +1,14 @@
+import glob
+import os
+
+import pytest
+
+CHATBOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Chatbot")
+
+
+@pytest.mark.parametrize("path", sorted(glob.glob(os.path.join(CHATBOT, "*.py"))), ids=os.path.basename)
+def test_chatbot_sources_keep_crlf(path):
+    # Chatbot/ has always used CRLF; a mixed file means an editor flipped it
+    with open(path, "rb") as f:
+        data = f.read()
+    assert data.count(b"\n") == data.count(b"\r\n")
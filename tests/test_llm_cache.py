@@ -0,0 +1,50 @@
+from llm_cache import ResponseCache
+
+
+def state(text="hi there", distress="low"):
+    return {
+        "user_input": text,
+        "current_emotion": "sadness",
+        "distress_level": distress,
+        "emotion_trend": None,
+        "last_bot_action": None
+    }
+
+
+def test_rotates_variants_after_min_variants():
+    cache = ResponseCache(min_variants=2, variants=2)
+    cache.put(state(), "one")
+    assert cache.get(state()) is None
+
+    cache.put(state(), "two")
+    served = {cache.get(state("Hi  there!")) for _ in range(4)}
+    assert served == {"one", "two"}
+
+
+def test_key_includes_prompt_state():
+    cache = ResponseCache(min_variants=1)
+    cache.put(state(), "reply")
+    other = dict(state(), current_emotion="joy")
+    assert cache.get(other) is None
+
+
+def test_high_distress_and_long_texts_bypass():
+    cache = ResponseCache(min_variants=1, max_words=3)
+    cache.put(state(distress="high"), "reply")
+    cache.put(state("one two three four"), "reply")
+    assert cache.get(state(distress="high")) is None
+    assert cache.get(state("one two three four")) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_session_context_replies_are_never_shared():
+    cache = ResponseCache(min_variants=1)
+    # Generated with one session's Ollama context
+    cache.put(state(), "As you said about your sister...", context=[1, 2, 3])
+    assert cache.stats()["size"] == 0
+    assert cache.get(state()) is None
+
+    # A context-free reply is cached, but not served to a turn with context
+    cache.put(state(), "reply")
+    assert cache.get(state(), context=[4, 5]) is None
+    assert cache.get(state()) == "reply"
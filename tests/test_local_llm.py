@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+
+import local_llm
+from fake_ollama import start_fake_ollama
+from local_llm import CircuitBreaker, LLMCancelled
+
+
+@pytest.fixture
+def slow_ollama(monkeypatch):
+    server = start_fake_ollama(latency_ms=20, tokens_per_sec=20, reply_tokens=100)
+    monkeypatch.setattr(
+        local_llm, "OLLAMA_URL", f"http://127.0.0.1:{server.server_address[1]}/api/generate"
+    )
+    yield server
+    server.shutdown()
+
+
+def test_cancel_stops_generation_and_frees_slot(slow_ollama):
+    cancel = threading.Event()
+    threading.Timer(0.3, cancel.set).start()
+
+    started = time.monotonic()
+    with pytest.raises(LLMCancelled):
+        local_llm.generate_local_llm("hello", cancel=cancel)
+
+    # 100 tokens at 20/s would take 5s
+    assert time.monotonic() - started < 2
+    assert local_llm.circuit_state()["in_flight"] == 0
+    # Abandoning a call is not an Ollama failure
+    assert local_llm.breaker.failures == 0
+
+
+def test_cancellable_call_returns_full_reply(monkeypatch):
+    server = start_fake_ollama(latency_ms=0, tokens_per_sec=0, reply_tokens=5)
+    monkeypatch.setattr(
+        local_llm, "OLLAMA_URL", f"http://127.0.0.1:{server.server_address[1]}/api/generate"
+    )
+    try:
+        contexts = []
+        reply = local_llm.generate_local_llm(
+            "hello", cancel=threading.Event(), on_context=contexts.append
+        )
+        assert reply == local_llm.generate_local_llm("hello")
+        assert len(reply.split()) == 5 and contexts
+    finally:
+        server.shutdown()
+
+
+def test_breaker_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow() == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.allow() is None
+
+    time.sleep(0.06)
+    assert breaker.allow() == CircuitBreaker.HALF_OPEN
+    # Everyone else fails fast while the probe is in flight
+    assert breaker.allow() is None
+    assert breaker.allow() is None
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    time.sleep(0.06)
+    assert breaker.allow() == CircuitBreaker.HALF_OPEN
+    breaker.record_success()
+    assert breaker.allow() == CircuitBreaker.CLOSED
+
+
+def test_breaker_probe_without_answer_is_handed_back():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow() == CircuitBreaker.HALF_OPEN
+    breaker.release_probe()
+    assert breaker.allow() == CircuitBreaker.HALF_OPEN
+
+
+def test_half_open_probe_released_when_no_slot(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    monkeypatch.setattr(local_llm, "breaker", breaker)
+    monkeypatch.setattr(local_llm, "_slots", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(local_llm, "SLOT_WAIT", 0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+
+    local_llm._slots.acquire()
+    with pytest.raises(local_llm.LLMUnavailable):
+        with local_llm.generation_slot():
+            pass
+    local_llm._slots.release()
+    assert breaker.allow() == CircuitBreaker.HALF_OPEN
+
+
+def test_stream_yields_reply_in_chunks(monkeypatch):
+    server = start_fake_ollama(latency_ms=0, tokens_per_sec=0, reply_tokens=6)
+    monkeypatch.setattr(
+        local_llm, "OLLAMA_URL", f"http://127.0.0.1:{server.server_address[1]}/api/generate"
+    )
+    try:
+        contexts = []
+        chunks = list(local_llm.generate_local_llm("hello", stream=True, on_context=contexts.append))
+        assert len(chunks) > 1
+        assert "".join(chunks).strip() == local_llm.generate_local_llm("hello")
+        assert contexts
+    finally:
+        server.shutdown()
@@ -0,0 +1,46 @@
+from metrics import Counter, Gauge, Histogram, render
+
+
+def test_render_types_and_values():
+    hist = Histogram("test_stage_seconds", "Stages", label="stage", buckets=(0.1, 1))
+    hist.observe("llm", 0.05)
+    hist.observe("llm", 5)
+    counter = Counter("test_errors_total", "Errors", label="reason")
+    counter.inc("timeout")
+    counter.inc("timeout", 2)
+    Gauge("test_queue_depth", "Queue", lambda: 3)
+
+    text = render()
+    assert 'test_stage_seconds_bucket{stage="llm",le="0.1"} 1' in text
+    assert 'test_stage_seconds_bucket{stage="llm",le="+Inf"} 2' in text
+    assert 'test_errors_total{reason="timeout"} 3' in text
+    assert "test_queue_depth 3" in text
+
+
+def test_collected_counter_is_a_counter():
+    events = {"created": 2, "expired": 1}
+    Counter("test_events_total", "Events", label="event", collect=lambda: events)
+    text = render()
+    assert "# TYPE test_events_total counter" in text
+    assert 'test_events_total{event="created"} 2' in text
+
+
+def test_session_events_exported_as_counter():
+    import conversation  # registers the session metrics
+
+    conversation.get_session("metrics-test")
+    text = render()
+    assert "# TYPE chat_session_events_total counter" in text
+    assert "# TYPE chat_session_events gauge" not in text
+
+
+def test_llm_cache_counts_exported():
+    from llm_cache import response_cache  # registers the cache metrics
+
+    state = {"current_emotion": "sadness", "distress_level": "low", "user_input": "metrics cache"}
+    response_cache.get(state, context=[1])
+    stats = response_cache.stats()
+    text = render()
+    assert "# TYPE chat_llm_cache_total counter" in text
+    assert f'chat_llm_cache_total{{result="bypassed"}} {stats["bypassed"]}' in text
+    assert f'chat_llm_cache_entries {stats["size"]}' in text
@@ -0,0 +1,46 @@
+import pytest
+
+from micro_batcher import MicroBatcher
+
+
+def test_concurrent_calls_share_a_batch():
+    sizes = []
+
+    def double(items):
+        sizes.append(len(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(double, max_batch_size=8, max_wait_ms=50)
+    futures = [batcher.submit(i) for i in range(8)]
+    assert [f.result(5) for f in futures] == [i * 2 for i in range(8)]
+    assert max(sizes) > 1
+
+
+def test_batch_fn_errors_reach_every_caller():
+    def fail(items):
+        raise RuntimeError("boom")
+
+    batcher = MicroBatcher(fail, max_wait_ms=20)
+    futures = [batcher.submit(i) for i in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(5)
+
+
+def test_short_result_list_fails_every_caller():
+    drop_one = [True]
+
+    def results(items):
+        if drop_one[0]:
+            drop_one[0] = False
+            return items[:-1]
+        return items
+
+    batcher = MicroBatcher(results, max_batch_size=4, max_wait_ms=50)
+    futures = [batcher.submit(i) for i in range(4)]
+    for future in futures:
+        with pytest.raises(ValueError, match="results for"):
+            future.result(5)
+
+    # The worker keeps serving
+    assert batcher(7, timeout=5) == 7
@@ -0,0 +1,44 @@
+import threading
+
+import model_registry
+from model_registry import get_model, is_loaded, load_times, register, register_pipeline, warmup
+
+
+def test_factory_runs_once_on_first_use():
+    calls = []
+    barrier = threading.Barrier(4)
+
+    def factory():
+        calls.append(1)
+        return lambda text: text.upper()
+
+    register("test-lazy", factory, warmup_input=None)
+    assert not is_loaded("test-lazy")
+
+    def load():
+        barrier.wait()
+        get_model("test-lazy")
+
+    threads = [threading.Thread(target=load) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert is_loaded("test-lazy")
+    assert "test-lazy" in load_times()
+
+
+def test_warmup_runs_the_warmup_input():
+    seen = []
+    register("test-warm", lambda: seen.append, warmup_input="hello")
+    warmup(["test-warm"])
+    assert seen == ["hello"]
+
+
+def test_stub_backend_pipeline(monkeypatch):
+    monkeypatch.setattr(model_registry, "INFERENCE_BACKEND", "stub")
+    register_pipeline("test-stub", "text-classification", model="not-downloaded")
+    scores = get_model("test-stub")("I feel so sad")[0]
+    assert scores[0]["label"] == "sadness"
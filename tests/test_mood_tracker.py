@@ -0,0 +1,60 @@
+import random
+from collections import Counter
+
+import pytest
+
+from mood_tracker import DISTRESS_LEVELS, EMOTIONS, MoodTracker
+
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        MoodTracker(0)
+
+
+def test_single_slot_buffer():
+    tracker = MoodTracker(1)
+    tracker.log("sadness", "low")
+    tracker.log("anxiety", "high")
+    assert len(tracker) == 1
+    assert tracker.dominant_emotion() == "anxiety"
+    assert [e["emotion"] for e in tracker.history()] == ["anxiety"]
+
+
+def test_rollups_match_the_window():
+    rng = random.Random(1)
+    tracker = MoodTracker(16)
+    logged = []
+    for _ in range(200):
+        entry = (rng.choice(EMOTIONS[:-1]), rng.choice(DISTRESS_LEVELS[:-1]))
+        tracker.log(*entry)
+        logged.append(entry)
+
+        window = logged[-16:]
+        emotions = Counter(e for e, _ in window)
+        summary = tracker.summary()
+        assert summary["emotion_counts"] == dict(emotions)
+        assert summary["distress_counts"] == dict(Counter(d for _, d in window))
+        assert emotions[tracker.dominant_emotion()] == max(emotions.values())
+
+    assert [e["emotion"] for e in tracker.history(5)] == [e for e, _ in logged[-5:]]
+
+
+def test_log_mood_persists_analyze_output(monkeypatch):
+    import emotion_analysis
+    import mood_tracker
+    from inference_service import analyze
+
+    rows = []
+    monkeypatch.setattr(emotion_analysis, "persist_features", rows.append)
+
+    tracker = MoodTracker(4)
+    text = "I feel so alone and tired of everything"
+    mood_tracker.log_mood(tracker, "sadness", "high", text)
+    mood_tracker.log_mood(tracker, "sadness", "high", text)
+
+    result = analyze(text)
+    row = rows[-1]
+    assert row["emotion"] == result["top_emotion"]["label"]
+    assert row["sentiment_score"] == round(result["sentiment_score"], 3)
+    assert row["risk_level"] == result["risk_level"]
+    assert row["sadness_streak"] == 2
@@ -0,0 +1,53 @@
+import os
+import sys
+import types
+
+import model_registry
+from model_registry import get_model, register_pipeline
+from onnx_backend import ONNX_CACHE_DIR, _export_dir
+
+
+def test_export_dirs_per_model_and_precision():
+    assert _export_dir("org/model", quantize=False) == os.path.join(ONNX_CACHE_DIR, "org__model")
+    assert _export_dir("org/model", quantize=True) == os.path.join(ONNX_CACHE_DIR, "org__model-int8")
+
+
+def test_onnx_backend_serves_classification_pipelines(monkeypatch):
+    calls = []
+    fake = types.ModuleType("onnx_backend")
+    fake.onnx_pipeline = lambda task, **kwargs: calls.append((task, kwargs)) or task
+    monkeypatch.setitem(sys.modules, "onnx_backend", fake)
+    monkeypatch.setattr(model_registry, "INFERENCE_BACKEND", "onnx")
+    monkeypatch.setattr(model_registry, "MODEL_OFFLINE", True)
+
+    register_pipeline("test-onnx", "text-classification", model="org/model", top_k=None)
+    assert get_model("test-onnx") == "text-classification"
+
+    task, kwargs = calls[0]
+    assert kwargs["model"] == "org/model" and kwargs["top_k"] is None
+    assert kwargs["model_kwargs"] == {"local_files_only": True}
+
+
+def test_backend_can_be_pinned_per_model(monkeypatch):
+    monkeypatch.setattr(model_registry, "INFERENCE_BACKEND", "onnx")
+    register_pipeline("test-pinned", "text-classification", model="org/model", backend="stub")
+    assert get_model("test-pinned")("I feel sad")[0][0]["label"] == "sadness"
+
+
+def test_parity_compares_distributions():
+    from onnx_parity import MODELS, compare_outputs
+
+    assert all("MiniLM" not in model for model, _ in MODELS.values())
+
+    ref = [
+        [{"label": "sadness", "score": 0.9}, {"label": "joy", "score": 0.1}],
+        [{"label": "joy", "score": 0.6}, {"label": "sadness", "score": 0.4}]
+    ]
+    got = [
+        [{"label": "sadness", "score": 0.88}, {"label": "joy", "score": 0.12}],
+        [{"label": "sadness", "score": 0.55}, {"label": "joy", "score": 0.45}]
+    ]
+    result = compare_outputs(ref, got)
+    assert result["agreement"] == 0.5
+    assert abs(result["max_top_drift"] - 0.15) < 1e-9
+    assert abs(result["max_label_drift"] - 0.15) < 1e-9
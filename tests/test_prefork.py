@@ -0,0 +1,38 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine
+
+import conversation
+import prefork
+from session_store import SqlSessionStore
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+def test_worker_gets_its_own_session_store_connections(tmp_path, monkeypatch):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'sessions.db'}", connect_args={"check_same_thread": False}
+    )
+    store = SqlSessionStore(engine)
+    monkeypatch.setattr(conversation, "session_store", store)
+    store.save(store.get("parent"))
+    inherited = engine.pool
+
+    pid = os.fork()
+    if pid == 0:
+        ok = False
+        try:
+            prefork.reset_after_fork()
+            session = store.get("child")
+            session["turn_count"] = 1
+            store.save(session)
+            ok = engine.pool is not inherited and store.get("parent") is not None
+        finally:
+            os._exit(0 if ok else 1)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    # The master's pool is untouched and sees the worker's write
+    assert engine.pool is inherited
+    assert store.get("child")["turn_count"] == 1
+    engine.dispose()
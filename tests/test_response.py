@@ -0,0 +1,157 @@
+import json
+import os
+import time
+
+import pytest
+
+CHATBOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Chatbot")
+
+
+@pytest.fixture
+def response(monkeypatch):
+    # response.py loads the response bank relative to Chatbot/
+    monkeypatch.chdir(CHATBOT)
+    import response
+
+    monkeypatch.setattr(response, "late_replies", response.LateReplies())
+    return response
+
+
+def state(text, emotion="sadness", distress="low"):
+    return {
+        "current_emotion": emotion,
+        "distress_level": distress,
+        "user_input": text,
+        "turn_count": 1
+    }
+
+
+def test_late_reply_keys_are_exact(response):
+    key = response.late_reply_key
+    context = [1, 2, 3]
+
+    assert key(state("hi"), context, {"session_id": "user-1"}) != \
+        key(state("hi"), context, {"session_id": "user1"})
+    assert key(state("hi abc"), None) != key(state("hi"), context, {"session_id": "abc"})
+    assert key(state("Hi!"), None) != key(state("hi"), None)
+    # Context without a session id is never shared
+    assert key(state("hi"), context, {}) is None
+
+
+def test_late_replies_expire_and_evict(response):
+    cache = response.LateReplies(maxsize=2, ttl=0.05)
+    cache.set(("a",), "A")
+    cache.set(("b",), "B")
+    cache.get(("a",))
+    cache.set(("c",), "C")
+    assert cache.get(("b",)) is None
+    assert cache.get(("a",)) == "A"
+    time.sleep(0.06)
+    assert cache.get(("a",)) is None
+
+
+def test_race_deadline_includes_fallback_time(response, monkeypatch):
+    def slow_llm(prompt, context=None, on_context=None, cancel=None):
+        cancel.wait(2)
+        return "llm reply"
+
+    def slow_bank(emotion, turn_count, user_text):
+        time.sleep(0.3)
+        return "bank reply"
+
+    monkeypatch.setattr(response, "generate_local_llm", slow_llm)
+    monkeypatch.setattr(response, "dataset_response", slow_bank)
+
+    start = time.monotonic()
+    reply = response.race_llm(state("I feel sad"), 0.4, "prompt")
+    elapsed = time.monotonic() - start
+
+    assert reply == "bank reply"
+    assert elapsed < 0.6
+
+
+def test_stream_flags_truncated_reply(response, monkeypatch):
+    import server
+
+    def broken_stream(prompt, stream=False, context=None, on_context=None):
+        yield "Hello "
+        yield "there"
+        raise ConnectionError("stream dropped")
+
+    monkeypatch.setattr(response, "generate_local_llm", broken_stream)
+    monkeypatch.setattr(response, "decide_response_focus", lambda state: response.LLM_FOCUSES[0])
+    monkeypatch.setattr(response.response_cache, "get", lambda state, context=None: None)
+    before = dict(response.fallbacks._values)
+
+    resp = server.app.test_client().post(
+        "/chat/stream", json={"session_id": "stream-test", "message": "I feel sad"}
+    )
+    lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+
+    assert [line["token"] for line in lines[:-1]] == ["Hello ", "there"]
+    assert lines[-1]["done"] and lines[-1]["truncated"]
+    assert lines[-1]["response"] == "Hello there"
+    assert response.fallbacks._values["llm_truncated"] == before.get("llm_truncated", 0) + 1
+
+
+def test_stream_sends_tokens_then_done(response, monkeypatch):
+    import server
+
+    monkeypatch.setattr(
+        response, "generate_local_llm",
+        lambda prompt, stream=False, context=None, on_context=None: iter(["All ", "good"])
+    )
+    monkeypatch.setattr(response, "decide_response_focus", lambda state: response.LLM_FOCUSES[0])
+    monkeypatch.setattr(response.response_cache, "get", lambda state, context=None: None)
+
+    resp = server.app.test_client().post(
+        "/chat/stream", json={"session_id": "stream-ok", "message": "I feel sad"}
+    )
+    lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert [line["token"] for line in lines[:-1]] == ["All ", "good"]
+    assert lines[-1]["done"] and lines[-1]["response"] == "All good"
+    assert "truncated" not in lines[-1]
+
+
+def prompt_state(response, text="I feel sad"):
+    return response.build_prompt_state(text, "sadness", "low", None, [], 1, None)
+
+
+def test_llm_context_reused_within_session(response, monkeypatch):
+    llm_session = {"session_id": "ctx"}
+    prompt, context = response.llm_request(prompt_state(response), llm_session)
+    assert context is None and prompt.startswith(response.LLM_INTRO)
+
+    response.save_llm_context(llm_session, [[1, 2], [1, 2, 3]])
+    prompt, context = response.llm_request(prompt_state(response), llm_session)
+    assert context == [1, 2, 3]
+    assert prompt == response.build_turn_prompt(prompt_state(response))
+
+    # Idle past LLM_CONTEXT_IDLE: start over with the full prompt
+    monkeypatch.setattr(response, "LLM_CONTEXT_IDLE", 0)
+    prompt, context = response.llm_request(prompt_state(response), llm_session)
+    assert context is None and prompt.startswith(response.LLM_INTRO)
+    assert llm_session["llm_context"] is None
+
+
+def test_generate_response_threads_context(response, monkeypatch):
+    sent = []
+
+    def fake_llm(prompt, context=None, on_context=None, cancel=None):
+        sent.append(context)
+        on_context([len(sent)])
+        return f"reply {len(sent)}"
+
+    monkeypatch.setattr(response, "generate_local_llm", fake_llm)
+    monkeypatch.setattr(response, "decide_response_focus", lambda state: response.LLM_FOCUSES[0])
+    llm_session = {"session_id": "ctx-turns"}
+
+    for turn in (1, 2):
+        reply = response.generate_response(
+            emotion="sadness", distress_level="low", turn_count=turn,
+            user_text=f"turn {turn}", last_emotion=None, llm_session=llm_session
+        )
+        assert reply == f"reply {turn}"
+
+    assert sent == [None, [1]]
+    assert llm_session["llm_context"] == [2]
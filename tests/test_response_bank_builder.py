@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+import response_bank_builder as builder
+
+INTENTS = {"intents": [
+    {"tag": "sad", "responses": ["I'm sorry you feel low. Would you like to try a breathing exercise?"]},
+    {"tag": "work", "responses": ["How has your day been?", "Work can be a lot."]},
+    {"tag": "exams", "responses": ["Work can be a lot."]}
+]}
+
+
+@pytest.fixture
+def paths(tmp_path, monkeypatch):
+    intents = tmp_path / "intents.json"
+    intents.write_text(json.dumps(INTENTS))
+    monkeypatch.setattr(builder, "INTENTS_PATH", str(intents))
+    monkeypatch.setattr(builder, "BANK_PATH", str(tmp_path / "bank.json"))
+    monkeypatch.setattr(builder, "CACHE_PATH", str(tmp_path / "cache.json"))
+
+    classified = []
+
+    def detect_emotions(texts):
+        classified.extend(texts)
+        return [("anxiety", 0.9) for _ in texts]
+
+    monkeypatch.setattr(builder, "detect_emotions", detect_emotions)
+    return tmp_path, classified
+
+
+def test_build_is_incremental_and_stable(paths):
+    tmp_path, classified = paths
+    bank, count = builder.build_response_bank()
+    assert count == 2
+    assert sorted(classified) == ["How has your day been?", "Work can be a lot."]
+    assert bank["sadness"]["coping"] == INTENTS["intents"][0]["responses"]
+    assert bank["anxiety"]["reflection"] == ["How has your day been?"]
+    # Same text under two tags is stored once
+    assert bank["anxiety"]["encouragement"] == ["Work can be a lot."]
+
+    first = (tmp_path / "bank.json").read_text()
+    _, count = builder.build_response_bank()
+    assert count == 0 and len(classified) == 2
+    assert (tmp_path / "bank.json").read_text() == first
+
+
+def test_cache_drops_removed_responses(paths):
+    tmp_path, _ = paths
+    builder.build_response_bank()
+
+    smaller = {"intents": INTENTS["intents"][:1] + [{"tag": "work", "responses": ["Work can be a lot."]}]}
+    (tmp_path / "intents.json").write_text(json.dumps(smaller))
+    builder.build_response_bank()
+
+    cache = json.loads((tmp_path / "cache.json").read_text())
+    assert list(cache) == [builder.content_hash("Work can be a lot.")]
+
+
+def test_backend_is_part_of_the_hash(monkeypatch):
+    stub = builder.content_hash("Work can be a lot.")
+    monkeypatch.setattr(builder, "INFERENCE_BACKEND", "torch")
+    assert builder.content_hash("Work can be a lot.") != stub
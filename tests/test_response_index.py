@@ -0,0 +1,45 @@
+import pytest
+
+import response_index
+from response_index import build_index, load_index
+
+BANK = {
+    "sadness": {
+        "coping": [
+            "Try writing down what made today heavy",
+            "A short walk outside can help when you feel low",
+            "Call a friend you trust tonight"
+        ],
+        "validation": ["It makes sense to feel this way"]
+    },
+    "anxiety": {"coping": ["Breathe in for four counts, then out for six"]}
+}
+
+
+@pytest.fixture
+def index_paths(tmp_path, monkeypatch):
+    monkeypatch.setattr(response_index, "MATRIX_PATH", str(tmp_path / "index.npy"))
+    monkeypatch.setattr(response_index, "META_PATH", str(tmp_path / "index.json"))
+
+
+def test_best_response_ranks_by_similarity(index_paths):
+    assert build_index(BANK)[0] == 5
+    index = load_index(BANK)
+
+    assert index.best_response("should I call a friend tonight", "sadness", "coping") == [
+        "Call a friend you trust tonight"
+    ]
+    ranked = index.best_response("a walk outside", "sadness", "coping", k=5)
+    assert ranked[0] == "A short walk outside can help when you feel low"
+    assert sorted(ranked) == sorted(BANK["sadness"]["coping"])
+
+    assert index.best_response("hello", "anger", "coping") == []
+
+
+def test_stale_or_missing_index_is_not_loaded(index_paths):
+    assert load_index(BANK) is None
+
+    build_index(BANK)
+    changed = {"sadness": {"coping": ["Something new"]}}
+    with pytest.warns(RuntimeWarning, match="stale"):
+        assert load_index(changed) is None
@@ -0,0 +1,58 @@
+import time
+
+from result_cache import ResultCache, normalize_text
+
+
+def test_normalize_text():
+    assert normalize_text("  Hi!  there ") == normalize_text("hi there") == "hi there"
+
+
+def test_namespaces_share_text_without_colliding():
+    cache = ResultCache()
+    cache.set("emotion", "Hi!", 1)
+    cache.set("analysis", "hi", 2)
+    assert cache.get("emotion", "  HI ") == 1
+    assert cache.get("analysis", "hi") == 2
+    assert cache.get("other", "hi") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 1
+    assert stats["namespaces"]["emotion"] == {"hits": 1, "misses": 0}
+
+
+def test_lru_and_ttl_eviction():
+    cache = ResultCache(maxsize=2, ttl=0.05)
+    cache.set("ns", "a", 1)
+    cache.set("ns", "b", 2)
+    cache.get("ns", "a")
+    cache.set("ns", "c", 3)
+    assert cache.get("ns", "b") is None
+    assert cache.get("ns", "a") == 1
+
+    time.sleep(0.06)
+    assert cache.get("ns", "a") is None
+    assert cache.stats()["evictions"] == 2
+
+
+def test_get_or_compute_calls_once():
+    cache = ResultCache()
+    calls = []
+
+    def compute(text):
+        calls.append(text)
+        return len(text)
+
+    assert cache.get_or_compute("ns", "Hello", compute) == 5
+    assert cache.get_or_compute("ns", "hello!", compute) == 5
+    assert calls == ["Hello"]
+
+    # Nothing left after normalizing: never cached
+    cache.get_or_compute("ns", "?!", compute)
+    cache.get_or_compute("ns", "?!", compute)
+    assert calls == ["Hello", "?!", "?!"]
+
+
+def test_zero_size_caches_nothing():
+    cache = ResultCache(maxsize=0)
+    cache.set("ns", "a", 1)
+    assert cache.get("ns", "a") is None
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from Database.benchmark import synthetic_rows
+from Database.database import bulk_insert_features, init_db, make_engine
+from Database.models import FeatureDailyCount, FeatureDailyRollup
+from Database.rollups import rebuild_rollups
+from analytics.insights import (
+    basic_insights,
+    basic_insights_rollup,
+    recent_trend_rollup,
+    risk_insights,
+    risk_insights_rollup,
+)
+from analytics.load_data import load_features_df
+
+
+@pytest.fixture
+def engine():
+    engine = make_engine("sqlite://")
+    init_db(engine)
+    yield engine
+    engine.dispose()
+
+
+def snapshot(engine):
+    with engine.connect() as conn:
+        daily = conn.execute(
+            select(FeatureDailyRollup.__table__).order_by(FeatureDailyRollup.day)
+        ).all()
+        counts = conn.execute(select(FeatureDailyCount.__table__).order_by(
+            FeatureDailyCount.day, FeatureDailyCount.dimension, FeatureDailyCount.value
+        )).all()
+    # Sentiment sums differ only in float summation order
+    daily = [(r.day, r.row_count, round(r.sentiment_sum, 6), *r[3:]) for r in daily]
+    return daily, [tuple(r) for r in counts]
+
+
+def test_incremental_matches_rebuild(engine):
+    rows = list(synthetic_rows(5000, datetime(2025, 1, 1), 20 * 86400))
+    # Overlapping days across calls and chunks
+    for start in range(0, len(rows), 1200):
+        bulk_insert_features(rows[start:start + 1200], bind=engine, chunk_size=500)
+
+    incremental = snapshot(engine)
+    rebuild_rollups(engine)
+    assert snapshot(engine) == incremental
+
+
+def test_defaults_nulls_and_time_zones_match_rebuild(engine):
+    day = datetime(2025, 3, 1, 12)
+    # One call per key set: executemany needs the same keys in every row
+    for row in (
+        {"timestamp": day, "emotion": "sadness", "sentiment_score": -0.5, "risk_level": None},
+        {"timestamp": day, "emotion": "joy", "sentiment_score": 0.5, "sadness_streak": None},
+        {"timestamp": day, "emotion": "fear", "sentiment_score": -0.1},
+        {"timestamp": None, "emotion": "fear", "sentiment_score": -0.1},
+        {
+            "timestamp": datetime(2025, 3, 1, 23, 30, tzinfo=timezone(timedelta(hours=-5))),
+            "emotion": "joy", "sentiment_score": 0.2, "risk_level": "ELEVATED"
+        },
+    ):
+        bulk_insert_features([row], bind=engine)
+
+    incremental = snapshot(engine)
+    rebuild_rollups(engine)
+    assert snapshot(engine) == incremental
+
+    risk = risk_insights_rollup(engine)["risk_distribution"]
+    assert risk == {"LOW": 2, "ELEVATED": 1}
+
+
+def test_rollup_insights_match_dataframe(engine):
+    rows = list(synthetic_rows(20000, datetime(2025, 1, 1), 30 * 86400, seed=3))
+    bulk_insert_features(rows, bind=engine, chunk_size=3000)
+    df = load_features_df(bind=engine)
+
+    basic = basic_insights(df)
+    assert basic_insights_rollup(engine) == {
+        "total_days": len(df),
+        "avg_sentiment": basic["avg_sentiment"],
+        "most_common_emotion": basic["most_common_emotion"],
+        "max_sadness_streak": basic["max_sadness_streak"],
+    }
+
+    risk = risk_insights(df)
+    rollup = risk_insights_rollup(engine)
+    assert rollup["risk_distribution"] == {k: int(v) for k, v in risk["risk_distribution"].items()}
+    assert rollup["elevated_days"] == risk["elevated_days"]
+
+    days = df["timestamp"].dt.date
+    last = df[days >= days.max() - timedelta(days=6)]
+    assert recent_trend_rollup(7, engine) == {
+        "avg_recent_sentiment": round(last["sentiment_score"].mean(), 3),
+        "dominant_emotion_last_7_days": last["emotion"].mode()[0],
+        "avg_sadness_streak_last_7_days": round(last["sadness_streak"].astype(float).mean(), 2),
+    }
+
+
+def test_empty_rollups(engine):
+    assert basic_insights_rollup(engine)["total_days"] == 0
+    assert risk_insights_rollup(engine) == {"risk_distribution": {}, "elevated_days": 0}
+    assert recent_trend_rollup(bind=engine)["avg_recent_sentiment"] is None
@@ -0,0 +1,78 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from conversation import session_key
+from session_store import SESSION_ID_MAX_LEN, MemorySessionStore, SqlSessionStore
+
+
+def test_long_session_ids_do_not_merge():
+    prefix = "x" * SESSION_ID_MAX_LEN
+    first, second = session_key(prefix + "a"), session_key(prefix + "b")
+    assert first != second
+    assert len(first) <= SESSION_ID_MAX_LEN
+    assert session_key(prefix + "a") == first
+    assert session_key("short") == "short"
+
+
+def test_memory_store_lru_and_ttl():
+    store = MemorySessionStore(max_sessions=2, idle_ttl=0.05)
+    store.get("a")["turn_count"] = 3
+    store.get("b")
+    assert store.get("a")["turn_count"] == 3
+
+    store.get("c")  # evicts "b", the least recently used
+    assert len(store) == 2
+    assert store.get("b")["turn_count"] == 0
+    assert store.stats()["evicted"] >= 1
+
+    time.sleep(0.06)
+    assert store.get("a")["turn_count"] == 0
+    assert store.stats()["expired"] >= 1
+
+
+def test_session_context_is_packed_and_capped():
+    session = MemorySessionStore().get("a")
+    session["llm_context"] = [1, 2, 3]
+    assert session["llm_context"] == [1, 2, 3]
+    with pytest.raises(KeyError):
+        session["_llm_context"]
+
+    session["llm_context"] = list(range(10 ** 6))
+    assert session["llm_context"] is None
+
+
+@pytest.fixture
+def sql_store():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    yield SqlSessionStore(engine, max_sessions=2, idle_ttl=60, sweep_every=1)
+    engine.dispose()
+
+
+def test_sql_store_round_trip(sql_store):
+    session = sql_store.get("a")
+    session["turn_count"] = 2
+    session["emotion_history"] = ["sadness", "fear"]
+    session["llm_context"] = [7, 8, 9]
+    session["llm_context_at"] = 123.0
+    sql_store.save(session)
+
+    loaded = sql_store.get("a")
+    assert loaded["turn_count"] == 2
+    assert loaded["emotion_history"] == ["sadness", "fear"]
+    assert loaded["llm_context"] == [7, 8, 9]
+
+    sql_store.delete("a")
+    assert sql_store.get("a")["turn_count"] == 0
+
+
+def test_sql_store_sweeps_over_cap(sql_store):
+    for name in ("a", "b", "c"):
+        sql_store.save(sql_store.get(name))
+        time.sleep(0.01)
+    assert len(sql_store) == 2
+    assert sql_store.stats()["evicted"] >= 1